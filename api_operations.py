@@ -1,12 +1,13 @@
 from logging_config import logger
 from groq_test import run_groq_api as original_run_groq_api
-def run_groq_api(content, url):
+def run_groq_api(content, url, headings=None):
     """
     Wrapper function for calling the original Groq API implementation.
 
     Args:
         content (str): The text content to be processed.
         url (str): The URL associated with the content.
+        headings (dict): Heading text to link map of the page, used to chunk the content.
 
     Returns:
         str: The processed content returned by the original Groq API function.
@@ -17,7 +18,7 @@ def run_groq_api(content, url):
     try:
         # Call the original Groq API function
 
-        result = original_run_groq_api(content,url)
+        result = original_run_groq_api(content, url, headings=headings)
         return result
     except Exception as e:
         # Log the error if an exception occurs
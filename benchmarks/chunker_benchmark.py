@@ -0,0 +1,94 @@
+"""
+Compares the number of Groq calls and total prompt tokens of the old fixed 6000 character
+slicing with the token-aware chunker, on saved scraped_content.json files.
+
+Usage:
+    python benchmarks/chunker_benchmark.py [outputs/*/scraped_content.json]
+
+Without arguments it runs on data/chunker_pages.json: the text and headings that dom_text.extract_page
+takes from eleven pages of the Rust documentation (MIT/Apache-2.0), seven in English and four from the
+Japanese Rust by Example. Result of that run:
+
+    Pages: 11  (chunk budget 6305 tokens, prompt 453 tokens)
+    method         calls        tokens   mid-word cuts
+    fixed             40         89370              18
+    chunker           17         78940               0
+    Calls saved: 57.5%
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunker import chunk_content, count_tokens
+from groq_test import PROMPT_TEMPLATE, CHUNK_TOKENS
+
+MAX_LENGTH = 6000
+# Fixed corpus in the scraped_content.json format, used when no files are given
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'chunker_pages.json')
+
+
+def fixed_slices(content, max_length=MAX_LENGTH):
+    return [content[i:i+max_length] for i in range(0, len(content), max_length)]
+
+
+def split_offsets(content, parts):
+    """
+    Returns the offsets in content at which each part but the last ends. Both splitters only
+    drop or change whitespace, so the parts' other characters are matched against content in order.
+    """
+    offsets = []
+    position = 0
+    for part in parts[:-1]:
+        for char in part:
+            if char.isspace():
+                continue
+            while content[position].isspace():
+                position += 1
+            if content[position] != char:
+                raise ValueError(f"Part does not match the content at offset {position}")
+            position += 1
+        offsets.append(position)
+    return offsets
+
+
+def measure(content, parts, prompt_tokens):
+    """
+    Returns (calls, tokens, cut_words): tokens include the prompt sent with every part, and
+    cut_words counts split positions with a letter or digit on both sides in the original content.
+    """
+    tokens = sum(prompt_tokens + count_tokens(part) for part in parts)
+    cut_words = sum(1 for offset in split_offsets(content, parts)
+                    if content[offset - 1:offset].isalnum() and content[offset:offset + 1].isalnum())
+    return len(parts), tokens, cut_words
+
+
+def main(paths):
+    prompt_tokens = count_tokens(PROMPT_TEMPLATE.replace('{part}', ''))
+    totals = {'fixed': [0, 0, 0], 'chunker': [0, 0, 0]}
+    pages = 0
+
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+        for item in items:
+            content = item.get('content', '')
+            if not content:
+                continue
+            pages += 1
+            for name, parts in (('fixed', fixed_slices(content)),
+                                ('chunker', chunk_content(content, CHUNK_TOKENS, item.get('headings')))):
+                for index, value in enumerate(measure(content, parts, prompt_tokens)):
+                    totals[name][index] += value
+
+    print(f"Pages: {pages}  (chunk budget {CHUNK_TOKENS} tokens, prompt {prompt_tokens} tokens)")
+    print(f"{'method':<10}{'calls':>10}{'tokens':>14}{'mid-word cuts':>16}")
+    for name, (calls, tokens, cut_words) in totals.items():
+        print(f"{name:<10}{calls:>10}{tokens:>14}{cut_words:>16}")
+    if totals['fixed'][0]:
+        print(f"Calls saved: {1 - totals['chunker'][0] / totals['fixed'][0]:.1%}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or [DEFAULT_CORPUS])
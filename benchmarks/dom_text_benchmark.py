@@ -0,0 +1,112 @@
+"""
+Compares the old text extraction of ContentSpider.parse (XPath over all body text nodes, a regex
+per node and seven uncompiled DOTALL regexes over the joined text) with the single-pass
+dom_text.extract_page walk, on saved HTML pages or live URLs.
+
+Usage:
+    python benchmarks/dom_text_benchmark.py page1.html page2.html https://example.com/newsroom
+
+Results (Python 3.11, lxml 6, best of 5) on the HTML pages of the Rust documentation, chosen as large
+real-world pages full of inline code:
+
+    page                          KB    old ms    new ms  old words  new words  headings
+    book/ch17-03-more-futures     65      33.2       8.3       3835       4909      same
+    book/ch02-00-guessing-game    70      33.5      10.2       5778       6578      same
+    rustc/platform-support        78      50.1      17.7       3010       2863      same
+    rustc/lints/warn-by-default  227     191.3      40.7      17600      20819      same
+    rust-by-example/ja/print     391    1232.3     159.4      26243      27449      same
+    rustc/print                 1305   23814.2     531.8      91582     118021      same
+    cargo/print                 1828   47835.6     317.5      90271     154737      same
+    book/print                  1869   45394.7     532.5     137071     214097      same
+    reference/print             4028  206028.4     358.7     104729     138133      same
+
+The old patterns run over the joined text of the whole page, so a 'var ' or 'function ' in one text
+node makes them search (and on a match, delete) up to the next ';' or '}' anywhere after it; that cost
+grows faster than the page and removes prose between code samples, hence the lower old word counts.
+The new walk applies them per text node and stays linear.
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsel import Selector
+from dom_text import extract_page, strip_code
+
+REPEATS = 5
+
+
+def old_filter_content(content):
+    patterns_to_remove = [
+        r'//<!\[CDATA\[.*?\]\]>',
+        r'var .*?;',
+        r'function .*?\}',
+        r'\(function.*?\);',
+        r'formalyze.*?;',
+        r'<!--.*?-->',
+        r'<.*?>'
+    ]
+    for pattern in patterns_to_remove:
+        content = re.sub(pattern, '', content, flags=re.DOTALL)
+    return content.strip()
+
+
+def old_extract(selector):
+    content_data = {}
+    for heading in selector.xpath('//h1|//h2|//h3|//h4|//h5|//h6'):
+        heading_text = heading.xpath('normalize-space(.)').get()
+        link = heading.xpath('.//a/@href').extract_first()
+        content_data[heading_text] = link
+    text_nodes = selector.xpath('//body//*[not(self::script or self::style)]//text()').extract()
+    text_blocks = [re.sub(r'\s+', ' ', t.strip()) for t in text_nodes if t.strip()]
+    return content_data, old_filter_content(' '.join(text_blocks))
+
+
+def new_extract(selector):
+    headings, text_blocks = extract_page(selector.root)
+    return headings, ' '.join(block for block in (strip_code(t) for t in text_blocks) if block)
+
+
+def load(source):
+    if source.startswith(('http://', 'https://')):
+        import requests
+        return requests.get(source, timeout=30).text
+    with open(source, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def best_time(fn, selector):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(selector)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(sources):
+    totals = {'old': 0.0, 'new': 0.0}
+    print(f"{'page':<40}{'KB':>8}{'old ms':>10}{'new ms':>10}{'old words':>11}{'new words':>11}{'headings':>10}")
+    for source in sources:
+        html = load(source)
+        # Parse once; both extractors walk the same tree, as they do on a Scrapy response
+        selector = Selector(text=html)
+        old_time, (old_headings, old_text) = best_time(old_extract, selector)
+        new_time, (new_headings, new_text) = best_time(new_extract, selector)
+        totals['old'] += old_time
+        totals['new'] += new_time
+        same_headings = 'same' if set(old_headings) == set(new_headings) else f"{len(old_headings)}/{len(new_headings)}"
+        print(f"{source[-40:]:<40}{len(html) / 1024:>8.0f}{old_time * 1000:>10.1f}{new_time * 1000:>10.1f}"
+              f"{len(old_text.split()):>11}{len(new_text.split()):>11}{same_headings:>10}")
+    if totals['new']:
+        print(f"Total: old {totals['old'] * 1000:.1f} ms, new {totals['new'] * 1000:.1f} ms, "
+              f"speedup {totals['old'] / totals['new']:.1f}x")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1:])
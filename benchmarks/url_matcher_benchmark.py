@@ -0,0 +1,84 @@
+"""
+Compares the old per-link check of ContentSpider.should_visit_url (urlparse, a list lookup of the
+domain, any() over the keywords and two regexes) and the old filter_links regex with the shared
+UrlMatcher, on a synthetic list of URLs. Also checks that both give the same answers.
+
+Usage:
+    python benchmarks/url_matcher_benchmark.py [number_of_urls]
+"""
+import os
+import random
+import re
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_matcher import UrlMatcher, SPIDER_KEYWORDS, FILTER_KEYWORDS
+
+OLD_URL_PATTERN = re.compile(r'(press|news|newsPage|news-releases|newsroom|press-release|announcement|update|updates|news-research|press-room|results|media|releases|insights|statements|publications|reports|announcements|headlines|bulletin|communique|briefing|digest|gazette|journal|dispatch|news-feed|live-feed|breaking|newsletter)[a-zA-Z0-9-\/]+\/?$', re.IGNORECASE)
+OLD_EXCLUDE_PATTERN = re.compile(r'contact', re.IGNORECASE)
+OLD_FILTER_PATTERN = re.compile(r'press|news|newsPage|news-releases|newsroom|press-release|information|update|updates|news-research|press-room|results|media|releases|insights|statements|publications|reports|announcements|headlines|bulletin|communique|briefing|digest|gazette|journal|dispatch|news-feed|live-feed|breaking|newsletter', re.IGNORECASE)
+
+DOMAINS = [f"www.company{i}.com" for i in range(50)]
+SEGMENTS = ['about', 'products', 'careers', 'investors', 'en', 'us', 'blog', 'Newsroom', 'press-releases',
+            'media', 'contact', 'events', '2023', '2024', 'page', 'category', 'solutions', 'team', 'updates']
+
+
+def synthetic_urls(count, seed=1):
+    rng = random.Random(seed)
+    urls = []
+    for _ in range(count):
+        domain = rng.choice(DOMAINS) if rng.random() < 0.9 else f"cdn{rng.randint(0, 99)}.example.net"
+        path = '/'.join(rng.choice(SEGMENTS) for _ in range(rng.randint(1, 4)))
+        query = f"?page={rng.randint(1, 50)}" if rng.random() < 0.2 else ''
+        urls.append(f"https://{domain}/{path}/{rng.randint(1, 10 ** 6)}{query}")
+    return urls
+
+
+def old_should_visit_url(url, allowed_domains, keywords):
+    if urlparse(url).netloc not in allowed_domains:
+        return False
+    if any(keyword in url.lower() for keyword in keywords):
+        return True
+    if OLD_URL_PATTERN.search(url) and not OLD_EXCLUDE_PATTERN.search(url):
+        return True
+    return False
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(count):
+    urls = synthetic_urls(count)
+    allowed_domains = list(DOMAINS)
+
+    old_spider, old_spider_time = timed(lambda: [url for url in urls
+                                                 if old_should_visit_url(url, allowed_domains, SPIDER_KEYWORDS)])
+    spider_matcher = UrlMatcher(SPIDER_KEYWORDS, allowed_domains)
+    new_spider, new_spider_time = timed(lambda: spider_matcher.filter(urls))
+    single_spider, single_spider_time = timed(lambda: [url for url in urls if spider_matcher.matches(url)])
+
+    old_filter, old_filter_time = timed(lambda: [url for url in urls if OLD_FILTER_PATTERN.search(url)])
+    filter_matcher = UrlMatcher(FILTER_KEYWORDS)
+    new_filter, new_filter_time = timed(lambda: filter_matcher.filter(urls))
+
+    print(f"URLs: {count}")
+    print(f"{'check':<28}{'seconds':>10}{'URLs/s':>14}{'matched':>10}")
+    for name, seconds, matched in (('spider, old', old_spider_time, old_spider),
+                                   ('spider, matches()', single_spider_time, single_spider),
+                                   ('spider, filter()', new_spider_time, new_spider),
+                                   ('filter_links, old', old_filter_time, old_filter),
+                                   ('filter_links, filter()', new_filter_time, new_filter)):
+        print(f"{name:<28}{seconds:>10.3f}{count / seconds:>14,.0f}{len(matched):>10}")
+    print(f"Spider speedup: {old_spider_time / new_spider_time:.1f}x, filter_links speedup: "
+          f"{old_filter_time / new_filter_time:.1f}x")
+    print(f"Same results: spider {old_spider == new_spider == single_spider}, filter_links {old_filter == new_filter}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import re
+from urllib.parse import urlparse
+from chunker import count_tokens
+from logging_config import logger
+
+# A block on at least this share of a site's pages is treated as boilerplate
+BOILERPLATE_RATIO = float(os.getenv("BOILERPLATE_RATIO", "0.5"))
+# Pages a site needs before anything is treated as boilerplate
+BOILERPLATE_MIN_PAGES = int(os.getenv("BOILERPLATE_MIN_PAGES", "3"))
+
+INLINE_URL = re.compile(r'\b(?:https?://|www\.)\S+', re.IGNORECASE)
+WHITESPACE = re.compile(r'\s+')
+
+
+def clean_noise(text):
+    """
+    Removes inline URLs and collapses repeated whitespace.
+    """
+    return WHITESPACE.sub(' ', INLINE_URL.sub(' ', text)).strip()
+
+
+class SiteBoilerplate:
+    def __init__(self, ratio=BOILERPLATE_RATIO, min_pages=BOILERPLATE_MIN_PAGES):
+        """
+        Initialize the SiteBoilerplate class.
+        Counts on how many pages of one site each text block appears; blocks repeated across
+        most pages are the site's nav, footer, cookie banner and sitemap text.
+        :param ratio: Share of the pages a block must appear on to count as boilerplate.
+        :param min_pages: Pages needed before any block counts as boilerplate.
+        """
+        self.ratio = ratio
+        self.min_pages = min_pages
+        self.pages = 0
+        self.block_pages = {}
+
+    @staticmethod
+    def _block_key(block):
+        # Store a short digest instead of the text to keep memory flat on large sites
+        normalized = WHITESPACE.sub(' ', block).strip().lower()
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest()
+
+    def observe(self, blocks):
+        """
+        Learn the blocks of one page.
+        :param blocks: List of text blocks of the page.
+        """
+        self.pages += 1
+        for key in {self._block_key(block) for block in blocks}:
+            self.block_pages[key] = self.block_pages.get(key, 0) + 1
+
+    def is_boilerplate(self, block):
+        if self.pages < self.min_pages:
+            return False
+        count = self.block_pages.get(self._block_key(block), 0)
+        return count >= 2 and count >= self.ratio * self.pages
+
+    def boilerplate_blocks(self):
+        """
+        :return: Number of distinct blocks currently considered boilerplate.
+        """
+        if self.pages < self.min_pages:
+            return 0
+        return sum(1 for count in self.block_pages.values() if count >= 2 and count >= self.ratio * self.pages)
+
+    def clean(self, blocks):
+        """
+        Strip boilerplate blocks and inline noise from a page.
+        :param blocks: List of text blocks of the page.
+        :return: The cleaned content string.
+        """
+        return clean_noise(' '.join(block for block in blocks if not self.is_boilerplate(block)))
+
+
+class BoilerplateStripper:
+    def __init__(self, warmup_pages=None):
+        """
+        Initialize the BoilerplateStripper class.
+        Cleans items as they stream out of the crawl with one SiteBoilerplate model per domain. The first
+        warmup_pages items are held back until the model has seen enough pages to recognise boilerplate.
+        :param warmup_pages: Items held before the first one is released (BOILERPLATE_WARMUP_PAGES).
+        """
+        self.warmup_pages = warmup_pages or int(os.getenv("BOILERPLATE_WARMUP_PAGES", "10"))
+        self.models = {}
+        self.pending = []
+        self.raw_tokens = 0
+        self.cleaned_tokens = 0
+
+    def _model(self, item):
+        return self.models.setdefault(urlparse(item['url']).netloc, SiteBoilerplate())
+
+    def _clean(self, item):
+        self.raw_tokens += count_tokens(item.get('content', ''))
+        blocks = item.pop('blocks', None)
+        if blocks:
+            cleaned = self._model(item).clean(blocks)
+            if cleaned != item.get('content'):
+                item['content'] = cleaned
+        self.cleaned_tokens += count_tokens(item.get('content', ''))
+        return item
+
+    def feed(self, item):
+        """
+        Learn the blocks of an item.
+        :param item: Scraped item with 'url', 'content' and 'blocks'.
+        :return: List of cleaned items ready for the next stage (empty while warming up).
+        """
+        if item.get('blocks'):
+            self._model(item).observe(item['blocks'])
+        if self.pending is not None:
+            self.pending.append(item)
+            if len(self.pending) < self.warmup_pages:
+                return []
+            ready, self.pending = self.pending, None
+            return [self._clean(pending_item) for pending_item in ready]
+        return [self._clean(item)]
+
+    def flush(self):
+        """
+        :return: The items still held back, cleaned; used when the crawl ends during warmup.
+        """
+        ready, self.pending = self.pending or [], None
+        return [self._clean(item) for item in ready]
+
+    def report(self):
+        """
+        :return: Dictionary with the raw and cleaned token counts and the number of boilerplate blocks per domain.
+        """
+        report = {
+            'raw_tokens': self.raw_tokens,
+            'cleaned_tokens': self.cleaned_tokens,
+            'saved_percent': round(100 * (1 - self.cleaned_tokens / self.raw_tokens), 1) if self.raw_tokens else 0.0,
+            'boilerplate_blocks': {domain: model.boilerplate_blocks() for domain, model in self.models.items()},
+        }
+        logger.info(f"Boilerplate removal: {self.raw_tokens} raw tokens, {self.cleaned_tokens} cleaned tokens "
+                    f"({report['saved_percent']}% saved)")
+        return report
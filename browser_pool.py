@@ -0,0 +1,154 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from logging_config import logger
+
+
+class PooledBrowser:
+    def __init__(self, driver):
+        """
+        Wrap a Chrome driver with the bookkeeping the pool needs.
+        :param driver: The selenium webdriver instance.
+        """
+        self.driver = driver
+        self.pages = 0
+        self.broken = False
+
+    def record_page(self):
+        """
+        Count a page load towards the recycle limit.
+        """
+        self.pages += 1
+
+
+class BrowserPool:
+    def __init__(self, size=None, max_pages=None, lease_timeout=None):
+        """
+        Initialize the BrowserPool class.
+        Browsers are started lazily, kept warm between sites and never exceed the pool size.
+        :param size: Maximum number of Chrome instances alive at once (BROWSER_POOL_SIZE).
+        :param max_pages: Pages a browser may load before it is recycled (BROWSER_MAX_PAGES).
+        :param lease_timeout: Seconds to wait for a free browser before giving up (BROWSER_LEASE_TIMEOUT).
+        """
+        self.size = size or int(os.getenv("BROWSER_POOL_SIZE", "2"))
+        self.max_pages = max_pages or int(os.getenv("BROWSER_MAX_PAGES", "50"))
+        self.lease_timeout = lease_timeout or float(os.getenv("BROWSER_LEASE_TIMEOUT", "600"))
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _create_browser(self):
+        """
+        Start a new headless Chrome instance.
+        :return: A PooledBrowser wrapping the new driver.
+        """
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless')  # Run in headless mode
+        options.add_argument('--disable-gpu')
+        options.add_argument('--disable-dev-shm-usage')
+        driver = webdriver.Chrome(options=options)
+        logger.info("Started new headless Chrome for the browser pool")
+        return PooledBrowser(driver)
+
+    def _is_healthy(self, browser):
+        """
+        Check that the browser still responds to commands.
+        :param browser: The PooledBrowser to check.
+        :return: True if the browser can run a script, False otherwise.
+        """
+        try:
+            return browser.driver.execute_script("return 1") == 1
+        except Exception:
+            # A dead chromedriver fails with urllib3 connection errors rather than WebDriverException
+            return False
+
+    def _discard(self, browser):
+        """
+        Quit a browser that is broken or has reached its page limit.
+        :param browser: The PooledBrowser to quit.
+        """
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting browser: {e}")
+
+    def _acquire(self):
+        """
+        Take an idle healthy browser, or start a new one if none is idle.
+        Unhealthy idle browsers are replaced.
+        :return: A PooledBrowser ready for use.
+        """
+        if not self._slots.acquire(timeout=self.lease_timeout):
+            raise TimeoutError(f"No browser available after {self.lease_timeout} seconds")
+        try:
+            while True:
+                try:
+                    browser = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._create_browser()
+                if self._is_healthy(browser):
+                    return browser
+                logger.warning("Idle browser failed health check, replacing it")
+                self._discard(browser)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, browser):
+        """
+        Return a browser to the pool, or quit it if it crashed or needs recycling.
+        Its slot is freed either way, so the next lease starts a replacement.
+        :param browser: The PooledBrowser being returned.
+        """
+        try:
+            if self._closed or browser.broken or browser.pages >= self.max_pages:
+                if browser.pages >= self.max_pages:
+                    logger.info(f"Recycling browser after {browser.pages} pages")
+                self._discard(browser)
+                return
+            try:
+                # Clear state from the previous site before the next lease
+                browser.driver.delete_all_cookies()
+                browser.driver.get('about:blank')
+                self._idle.put(browser)
+            except Exception as e:
+                logger.warning(f"Browser failed while being reset, replacing it: {e}")
+                self._discard(browser)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def lease(self):
+        """
+        Lease a warm browser for the duration of a with block.
+        An exception raised inside the block marks the browser as crashed if it also fails
+        the health check, so it is replaced instead of returned to the pool.
+        """
+        browser = self._acquire()
+        try:
+            yield browser
+        except Exception:
+            browser.broken = not self._is_healthy(browser)
+            raise
+        finally:
+            self._release(browser)
+
+    def close(self):
+        """
+        Quit all idle browsers, used at interpreter exit.
+        """
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+# Instantiate BrowserPool; every site in the process leases from it
+
+browser_pool = BrowserPool()
@@ -0,0 +1,135 @@
+import re
+
+# Context window of llama3-8b-8192
+CONTEXT_TOKENS = 8192
+
+_PIECE_PATTERN = re.compile(r"[^\W\d_]+|\d+|[^\w\s]+|_+")
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=\S)')
+# Letters outside the Latin blocks; the vocabulary holds few multi-character pieces of CJK, Thai or Cyrillic text
+_NON_LATIN = re.compile(r'[^\x00-\u024f\u1e00-\u1eff]')
+
+
+def count_tokens(text):
+    """
+    Approximates the Llama 3 token count of a text without loading a tokenizer.
+    Latin words cost one token per five characters (most words are a single token), letters of
+    other scripts one token each, digits are grouped by three and punctuation runs by two, which is
+    how the BPE vocabulary splits them. Non-Latin text is overcounted rather than risk overflowing
+    the context window.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The approximate number of tokens.
+    """
+    tokens = 0
+    for piece in _PIECE_PATTERN.findall(text):
+        first = piece[0]
+        if first.isdigit():
+            tokens += (len(piece) + 2) // 3
+        elif first.isalpha():
+            non_latin = 0 if piece.isascii() else len(_NON_LATIN.findall(piece))
+            tokens += non_latin + (len(piece) - non_latin + 4) // 5
+        else:
+            tokens += (len(piece) + 1) // 2
+    return tokens
+
+
+def chunk_budget(prompt_template, expected_output_tokens, context_tokens=CONTEXT_TOKENS, safety_margin=0.05):
+    """
+    Computes how many content tokens fit in one request.
+
+    Args:
+        prompt_template (str): The prompt with a {part} placeholder.
+        expected_output_tokens (int): Tokens reserved for the completion.
+        context_tokens (int): Context window of the model.
+        safety_margin (float): Fraction of the context kept free to absorb counting errors.
+
+    Returns:
+        int: The token budget for the content of a chunk.
+    """
+    prompt_tokens = count_tokens(prompt_template.replace('{part}', ''))
+    return int(context_tokens * (1 - safety_margin)) - prompt_tokens - expected_output_tokens
+
+
+def split_sections(content, headings=None):
+    """
+    Splits flattened page content at the positions where the page's headings start.
+
+    Args:
+        content (str): The cleaned page text.
+        headings (dict): Heading text to link map produced by the spider, in document order.
+
+    Returns:
+        list: The sections of the content, each starting at a heading (except possibly the first).
+    """
+    boundaries = [0]
+    cursor = 0
+    for heading in (headings or {}):
+        if len(heading) < 3:
+            continue
+        index = content.find(heading, cursor)
+        if index > cursor:
+            boundaries.append(index)
+        if index >= 0:
+            cursor = index + len(heading)
+    boundaries.append(len(content))
+    return [content[start:end].strip() for start, end in zip(boundaries, boundaries[1:]) if content[start:end].strip()]
+
+
+def _split_oversized(section, max_tokens):
+    # Fall back to sentence boundaries, and to word boundaries for very long sentences
+    pieces = []
+    for sentence in _SENTENCE_END.split(section):
+        if count_tokens(sentence) <= max_tokens:
+            pieces.append(sentence)
+            continue
+        words = []
+        words_tokens = 0
+        for word in sentence.split(' '):
+            word_tokens = count_tokens(word)
+            if words and words_tokens + word_tokens > max_tokens:
+                pieces.append(' '.join(words))
+                words, words_tokens = [], 0
+            words.append(word)
+            words_tokens += word_tokens
+        if words:
+            pieces.append(' '.join(words))
+    return pieces
+
+
+def chunk_content(content, max_tokens, headings=None):
+    """
+    Packs the content into as few chunks as possible without exceeding max_tokens each.
+    Chunks break at heading boundaries first, then sentence boundaries, and only split
+    inside a sentence when a single sentence is larger than the budget.
+
+    Args:
+        content (str): The cleaned page text.
+        max_tokens (int): Token budget of one chunk.
+        headings (dict): Heading text to link map produced by the spider.
+
+    Returns:
+        list: The chunks, in document order.
+    """
+    pieces = []
+    for section in split_sections(content, headings):
+        section_tokens = count_tokens(section)
+        if section_tokens <= max_tokens:
+            pieces.append((section, section_tokens))
+        else:
+            pieces.extend((piece, count_tokens(piece)) for piece in _split_oversized(section, max_tokens))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for piece, piece_tokens in pieces:
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append(' '.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
@@ -0,0 +1,87 @@
+import os
+from collections import deque
+from urllib.parse import urlsplit
+from relevance_filter import POSITIVE_URL, NEGATIVE_URL, DATE_IN_URL
+
+# Per-site crawl budgets; pages and time through Scrapy's CLOSESPIDER_PAGECOUNT and CLOSESPIDER_TIMEOUT, depth by
+# the spider, which counts only followed links so pagination chains of any length stay within the budget
+PAGE_BUDGET = int(os.getenv("CRAWL_PAGE_BUDGET", "2000"))
+DEPTH_BUDGET = int(os.getenv("CRAWL_DEPTH_BUDGET", "6"))
+TIME_BUDGET = int(os.getenv("CRAWL_TIME_BUDGET", "3600"))
+# The crawl stops once the share of relevant pages among the last YIELD_WINDOW falls below MIN_YIELD
+MIN_YIELD = float(os.getenv("CRAWL_MIN_YIELD", "0.02"))
+YIELD_WINDOW = int(os.getenv("CRAWL_YIELD_WINDOW", "100"))
+
+# Where a link was found; listing pages and cards lead to releases more often than inline links
+SOURCE_PRIORITY = {
+    'seed': 30,
+    'pagination': 20,
+    'card': 15,
+    'link': 5,
+    'inline': 0,
+}
+
+
+# Sources that stay at the depth of the page they were found on
+FLAT_SOURCES = {'seed', 'pagination'}
+
+
+def link_depth(parent_depth, source):
+    """
+    :return: The depth of a link found on a page at parent_depth; pagination pages keep their parent's depth.
+    """
+    return parent_depth if source in FLAT_SOURCES else parent_depth + 1
+
+
+def request_priority(url, depth=0, source='link'):
+    """
+    Scores a request for Scrapy's priority queue; higher is crawled first.
+
+    Args:
+        url (str): The URL to request.
+        depth (int): Links followed from the seed URL to reach it.
+        source (str): Where the link was found, a key of SOURCE_PRIORITY.
+
+    Returns:
+        int: The request priority.
+    """
+    path = urlsplit(url).path
+    score = SOURCE_PRIORITY.get(source, 0) - 5 * depth
+    if POSITIVE_URL.search(path):
+        score += 20
+    if DATE_IN_URL.search(path):
+        score += 10
+    if NEGATIVE_URL.search(path):
+        score -= 30
+    return score
+
+
+class YieldTracker:
+    def __init__(self, window=YIELD_WINDOW, min_yield=MIN_YIELD):
+        """
+        Initialize the YieldTracker class.
+        Tracks which of the most recently parsed pages looked relevant. Since requests are crawled
+        best-first, a falling share means the rest of the queue is worth even less.
+        :param window: Number of recent pages considered; the check only starts once it is full.
+        :param min_yield: Share of relevant pages below which the crawl should stop.
+        """
+        self.window = window
+        self.min_yield = min_yield
+        self.recent = deque(maxlen=window)
+        self.pages = 0
+        self.relevant = 0
+
+    def observe(self, relevant):
+        self.pages += 1
+        self.relevant += bool(relevant)
+        self.recent.append(bool(relevant))
+
+    @property
+    def current_yield(self):
+        return sum(self.recent) / len(self.recent) if self.recent else 1.0
+
+    def exhausted(self):
+        """
+        :return: True once the window is full and its yield is below min_yield.
+        """
+        return len(self.recent) >= self.window and self.current_yield < self.min_yield
@@ -0,0 +1,222 @@
+import atexit
+import os
+import queue
+import sys
+import threading
+from logging_config import logger
+from metrics import metrics
+
+# Make the Scrapy project importable without changing the working directory
+SCRAPY_PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'website_content_scraper')
+if SCRAPY_PROJECT_DIR not in sys.path:
+    sys.path.insert(0, SCRAPY_PROJECT_DIR)
+
+from scrapy.utils.reactor import install_reactor
+from scrapy.settings import Settings
+
+# The reactor has to be installed before anything imports twisted.internet.reactor
+install_reactor("twisted.internet.asyncioreactor.AsyncioSelectorReactor")
+
+from scrapy import signals
+from scrapy.crawler import Crawler, CrawlerRunner
+from website_content_scraper.spiders.content_spider import ContentSpider
+
+# Items buffered between the crawl and its consumer before the crawl is slowed down
+CRAWL_QUEUE_SIZE = int(os.getenv("CRAWL_QUEUE_SIZE", "32"))
+
+SCRAPY_RESPONSES = metrics.counter('scrapy_responses_total', 'Responses downloaded by Scrapy', ['status'])
+SCRAPY_BYTES = metrics.counter('scrapy_response_bytes_total', 'Body bytes downloaded by Scrapy')
+SCRAPY_LATENCY = metrics.histogram('scrapy_download_seconds', 'Scrapy download latency per response')
+SCRAPY_ITEMS = metrics.counter('scrapy_items_total', 'Items scraped by the spider')
+
+
+class CrawlStream:
+    _DONE = object()
+
+    def __init__(self, max_items=CRAWL_QUEUE_SIZE):
+        """
+        Initialize the CrawlStream class.
+        Items scraped on the reactor thread are handed to the consuming thread through a bounded queue.
+        :param max_items: Capacity of the queue; a full queue holds back the spider's item processing.
+        """
+        self.queue = queue.Queue(maxsize=max_items)
+        self.pagination_info = {}
+        self.error = None
+        self.closed = False
+        self.finished = False
+        self.crawler = None
+
+    def __iter__(self):
+        """
+        Yield items as the crawl produces them, until the crawl finishes.
+        Raises the crawl's exception, if any, after the last item.
+        """
+        while True:
+            item = self.queue.get()
+            if item is self._DONE:
+                break
+            yield item
+        if self.error:
+            raise self.error
+
+    def close(self):
+        """
+        Stop accepting items, so a consumer that gives up never leaves the crawl blocked on a full queue,
+        and close the spider if the crawl is still running, so it does not go on until its time budget.
+        """
+        self.closed = True
+        if not self.finished and self.crawler is not None:
+            from twisted.internet import reactor
+            reactor.callFromThread(self._close_spider)
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def _close_spider(self):
+        # Runs on the reactor thread; the crawl may have ended since close() was called
+        crawler = self.crawler
+        if self.finished or crawler.engine is None or crawler.spider is None:
+            return
+        logger.info(f"Closing {crawler.spider.name}: the consumer stopped reading its items")
+        crawler.engine.close_spider(crawler.spider, 'consumer_closed')
+
+
+class CrawlRunner:
+    def __init__(self):
+        """
+        Initialize the CrawlRunner class.
+        Loads the Scrapy project settings once; the reactor thread is started lazily on the first crawl.
+        """
+        self.settings = Settings()
+        self.settings.setmodule('website_content_scraper.settings', priority='project')
+        self._runner = None
+        self._reactor_thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_reactor(self):
+        """
+        Start the long-lived Twisted reactor in a daemon thread if it is not running yet.
+        """
+        with self._lock:
+            if self._reactor_thread is not None:
+                return
+            from twisted.internet import reactor
+
+            self._runner = CrawlerRunner(self.settings)
+            self._reactor_thread = threading.Thread(
+                target=reactor.run,
+                kwargs={'installSignalHandlers': False},
+                name='scrapy-reactor',
+                daemon=True
+            )
+            self._reactor_thread.start()
+            atexit.register(self.stop)
+            logger.info("Started in-process Scrapy reactor")
+
+    def _enqueue(self, stream, item):
+        """
+        Put an item on the stream's queue without blocking the reactor. While the queue is full the
+        returned Deferred keeps retrying, and because Scrapy waits for item_scraped handlers, the
+        crawl slows down until the consumer catches up.
+        """
+        if stream.closed:
+            return None
+        try:
+            stream.queue.put_nowait(item)
+            return None
+        except queue.Full:
+            from twisted.internet import reactor, task
+            return task.deferLater(reactor, 0.1, self._enqueue, stream, item)
+
+    def _start_crawl(self, stream, input_file, output_json_path, output_dir):
+        """
+        Create a crawler with its own feed and output directory and start it. Runs on the reactor thread.
+        """
+        try:
+            crawl_settings = self.settings.copy()
+            crawl_settings.set('OUTPUT_DIR', output_dir, priority='cmdline')
+            crawl_settings.set('FEEDS', {
+                output_json_path: {
+                    'format': 'json',
+                    'overwrite': True,
+                    'encoding': 'utf-8',
+                    # The per-node blocks are only needed in memory for boilerplate removal
+                    'fields': ['url', 'headings', 'content']
+                }
+            }, priority='cmdline')
+
+            crawler = Crawler(ContentSpider, crawl_settings)
+            stream.crawler = crawler
+
+            def stream_item(item, response, spider):
+                SCRAPY_ITEMS.inc()
+                return self._enqueue(stream, dict(item))
+
+            crawler.signals.connect(stream_item, signal=signals.item_scraped, weak=False)
+
+            def count_response(response, request, spider):
+                SCRAPY_RESPONSES.inc(status=response.status)
+                SCRAPY_BYTES.inc(len(response.body))
+                latency = request.meta.get('download_latency')
+                if latency is not None:
+                    SCRAPY_LATENCY.observe(latency)
+
+            crawler.signals.connect(count_response, signal=signals.response_received, weak=False)
+
+            def crawl_finished(_):
+                stream.finished = True
+                spider = crawler.spider
+                stream.pagination_info = spider.get_pagination_info() if spider else {}
+                return self._enqueue(stream, CrawlStream._DONE)
+
+            def crawl_failed(failure):
+                stream.finished = True
+                stream.error = failure.value
+                return self._enqueue(stream, CrawlStream._DONE)
+
+            deferred = self._runner.crawl(crawler, input_file=input_file)
+            deferred.addCallbacks(crawl_finished, crawl_failed)
+        except Exception as e:
+            stream.error = e
+            stream.queue.put(CrawlStream._DONE)
+
+    def crawl_stream(self, input_file, output_json_path, output_dir, max_items=CRAWL_QUEUE_SIZE):
+        """
+        Start ContentSpider for one site on the shared reactor and return its items as they are scraped.
+        Safe to call from several threads at once; every call gets its own crawler.
+
+        Args:
+            input_file (str): Path to the JSON file containing the filtered links to crawl.
+            output_json_path (str): Path where the feed with the scraped items will be saved.
+            output_dir (str): Directory for the spider to store its output files.
+            max_items (int): Items buffered before the crawl is slowed down.
+
+        Returns:
+            CrawlStream: Iterable of items; its pagination_info is set once iteration has finished.
+        """
+        self._ensure_reactor()
+        from twisted.internet import reactor
+
+        os.makedirs(output_dir, exist_ok=True)
+        stream = CrawlStream(max_items)
+        reactor.callFromThread(self._start_crawl, stream, input_file, output_json_path, output_dir)
+        return stream
+
+    def stop(self):
+        """
+        Stop the reactor thread, used at interpreter exit.
+        """
+        if self._reactor_thread is None:
+            return
+        from twisted.internet import reactor
+
+        if reactor.running:
+            reactor.callFromThread(reactor.stop)
+        self._reactor_thread.join(timeout=10)
+
+
+# Instantiate CrawlRunner; every site in the process shares its reactor
+
+crawl_runner = CrawlRunner()
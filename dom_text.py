@@ -0,0 +1,86 @@
+import re
+
+# Subtrees whose text is never page content
+SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+# Script and markup fragments that can still show up in text nodes, e.g. inline handlers or escaped HTML
+CODE_PATTERNS = [re.compile(pattern, re.DOTALL) for pattern in (
+    r'//<!\[CDATA\[.*?\]\]>',
+    r'var .*?;',
+    r'function .*?\}',
+    r'\(function.*?\);',
+    r'formalyze.*?;',
+    r'<!--.*?-->',
+    r'<.*?>'
+)]
+_CODE_MARKERS = ('<', 'var ', 'function', 'formalyze')
+
+
+def strip_code(text):
+    """
+    Removes script and markup fragments from a piece of text. The patterns only run on text
+    that contains one of their markers, which most text nodes do not.
+    """
+    if not any(marker in text for marker in _CODE_MARKERS):
+        return text.strip()
+    for pattern in CODE_PATTERNS:
+        text = pattern.sub('', text)
+    return text.strip()
+
+
+def extract_page(root):
+    """
+    Walks the body of a parsed HTML page once, skipping script, style, noscript and template subtrees,
+    and collects its text blocks and headings.
+
+    Args:
+        root: The lxml root element of the page (response.selector.root in Scrapy).
+
+    Returns:
+        tuple: (headings, blocks) where headings maps each heading's text to the href of its first
+        link (or None), and blocks is the list of whitespace-normalized text nodes in document order.
+    """
+    body = root.find('body') if root.tag == 'html' else root
+    if body is None:
+        body = root
+    blocks = []
+    headings = {}
+    heading = None  # [element, raw text parts, href]
+
+    def add_text(text):
+        if not text:
+            return
+        if heading is not None:
+            heading[1].append(text)
+        normalized = ' '.join(text.split())
+        if normalized:
+            blocks.append(normalized)
+
+    stack = [(body, False)]
+    while stack:
+        element, closing = stack.pop()
+        if closing:
+            if heading is not None and heading[0] is element:
+                headings[' '.join(''.join(heading[1]).split())] = heading[2]
+                heading = None
+            if element is not body:
+                add_text(element.tail)
+            continue
+
+        tag = element.tag
+        # Comments and processing instructions have no string tag; only their tail is page text
+        if not isinstance(tag, str) or tag.lower() in SKIP_TAGS:
+            add_text(element.tail)
+            continue
+        tag = tag.lower()
+        if heading is None and tag in HEADING_TAGS:
+            heading = [element, [], None]
+        elif heading is not None and tag == 'a' and heading[2] is None and element.get('href'):
+            heading[2] = element.get('href')
+
+        add_text(element.text)
+        stack.append((element, True))
+        stack.extend((child, False) for child in reversed(element))
+
+    return headings, blocks
@@ -1,8 +1,9 @@
 import pandas as pd
 from logging_config import logger
-from openpyxl import Workbook, load_workbook
+from metrics import metrics
+from openpyxl import Workbook
 import os
-import json
+import time
 
 def read_input_file(filename):
     """
@@ -54,120 +55,51 @@ def get_excel_file_path(parent_url):
     return os.path.join(output_dir, f'output_{safe_filename}.xlsx')
 
 
-def update_excel(parent_url, row, pagination_info):
-    """
-    Updates or creates an Excel file with new data.
-
-    Args:
-        parent_url (str): The parent URL used to determine the file path.
-        row (list): The data row to append to the Excel file.
-        pagination_info (dict): Pagination information to update in the row if applicable.
+EXCEL_FLUSH = metrics.histogram('excel_flush_seconds', 'Time to build and save an Excel file', ['outcome'])
+EXCEL_ROWS = metrics.counter('excel_rows_written_total', 'Result rows written to Excel files')
 
-    Returns:
-        None
-    """
-    excel_file = get_excel_file_path(parent_url)
-    # Create a new Excel file if it doesn't exist
-
-    if not os.path.exists(excel_file):
-        logger.info(f"Excel file not found. Creating new workbook: {excel_file}")
-        wb = Workbook()
-        ws = wb.active
-        ws.append(['ID', 'Parent_url', 'Extracted links', 'Potential release', 'Final releases', 
-                   'Pagination parent url', 'Pagination links', 'Number of pages'])
-        try:
-            wb.save(excel_file)
-        except Exception as e:
-            logger.error(f"Error creating Excel file: {e}")
-            return
-    # Load the existing Excel file
-
-    try:
-        wb = load_workbook(excel_file)
-        ws = wb.active
-    except Exception as e:
-        logger.error(f"Error loading Excel file: {e}")
-        return
-    # Get the potential release URL from the row
-
-    potential_release_url = row[3]
-    logger.info(f"Potential Release URL: {potential_release_url}")
-    # Check if there is matching pagination info
-
-    matching_pagination = next((
-        (parent_url, info) for parent_url, info in pagination_info.items()
-        if parent_url == potential_release_url
-    ), None)
-    # Update the row with pagination info if found
-
-    if matching_pagination:
-        parent_url, page_info = matching_pagination
-        logger.info(f"Found pagination info for {parent_url}: {page_info}")
-        row[5] = parent_url
-        row[6] = json.dumps(page_info['pagination_links'])
-        row[7] = page_info['page_count']
-    else:
-        logger.info(f"No pagination info found for {potential_release_url}")
-        row[5] = ''
-        row[6] = '[]'
-        row[7] = ''
-    # Append the updated row to the sheet
-
-    ws.append(row)
-    logger.info(f"Row appended: {row}")
-    # Save changes to the Excel file
+HEADERS = ['ID', 'Parent_url', 'Extracted links', 'Potential release', 'Final releases',
+           'Pagination parent url', 'Pagination links', 'Number of pages']
 
-    try:
-        wb.save(excel_file)
-        logger.info(f"Excel file saved successfully: {excel_file}")
-    except PermissionError:
-        logger.error(f"Unable to save Excel file. It might be open in another program.")
-    except Exception as e:
-        logger.error(f"Error saving Excel file: {e}")
 
-def remove_row_from_excel(parent_url, url):
+def save_rows(excel_file, rows, extra_sheets=None):
     """
-    Removes a row from the Excel file where the URL matches the given URL.
+    Writes the header and rows to an Excel file with a write-only (streaming) workbook, so memory
+    stays constant however large the output. The file is replaced atomically.
 
     Args:
-        parent_url (str): The parent URL used to determine the file path.
-        url (str): The URL to identify the row to be removed.
+        excel_file (str): Path of the Excel file.
+        rows (iterable): The data rows, in the order of HEADERS.
+        extra_sheets (dict): Optional sheet title to (headers, rows) for additional sheets.
 
     Returns:
-        None
+        bool: True if the file was saved, False otherwise.
     """
-    excel_file = get_excel_file_path(parent_url)
-    # Create a new Excel file if it doesn't exist
-
-    if not os.path.exists(excel_file):
-        logger.warning(f"Excel file not found: {excel_file}. Creating a new file.")
-        wb = Workbook()
-        ws = wb.active
-        ws.append(['ID', 'Parent_url', 'Extracted links', 'Potential release', 'Final releases', 
-                   'Pagination parent url', 'Pagination links', 'Number of pages'])
-        wb.save(excel_file)
-    # Load the existing Excel file
-
-    
+    start_time = time.time()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Results')
+    ws.append(HEADERS)
+    row_count = 0
+    for row in rows:
+        ws.append(row)
+        row_count += 1
+    for title, (headers, sheet_rows) in (extra_sheets or {}).items():
+        sheet = wb.create_sheet(title)
+        sheet.append(headers)
+        for row in sheet_rows:
+            sheet.append(row)
+
+    temp_file = excel_file + '.tmp'
     try:
-        wb = load_workbook(excel_file)
-        ws = wb.active
-        rows_to_delete = []
-        # Identify rows to delete
-
-        for idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-            if row[3] == url:
-                rows_to_delete.append(idx)
-        # Delete identified rows
-
-        for row_id in reversed(rows_to_delete):
-            ws.delete_rows(row_id)
-        # Save the changes to the Excel file
- 
-        if rows_to_delete:
-            wb.save(excel_file)
-            print(f"Removed row with URL: {url} from Excel file.")
-        else:
-            print(f"No matching row found for URL: {url} in Excel file.")
+        wb.save(temp_file)
+        os.replace(temp_file, excel_file)
+        EXCEL_FLUSH.observe(time.time() - start_time, outcome='ok')
+        EXCEL_ROWS.inc(row_count)
+        logger.info(f"Excel file saved successfully: {excel_file} in {time.time() - start_time:.2f} seconds")
+        return True
+    except PermissionError:
+        logger.error(f"Unable to save Excel file. It might be open in another program.")
     except Exception as e:
-        logger.error(f"Error manipulating Excel file: {e}")
\ No newline at end of file
+        logger.error(f"Error saving Excel file: {e}")
+    EXCEL_FLUSH.observe(time.time() - start_time, outcome='error')
+    return False
@@ -1,16 +1,46 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import json
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+import atexit
 import time
+from browser_pool import browser_pool
+from logging_config import logger
+from metrics import metrics
 
-def scrape_pagination(url):
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless')  # Run in headless mode
-    driver = webdriver.Chrome(options=options)
+SELENIUM_PAGES = metrics.counter('selenium_pages_total', 'Pages loaded in Selenium browsers')
+SELENIUM_PAGE_SECONDS = metrics.histogram('selenium_page_seconds', 'Time to load, scroll and read the links of one Selenium page')
+
+# Quit the warm browsers when the process exits
+atexit.register(browser_pool.close)
+
+def scrape_pagination(url, max_attempts=2):
+    """
+    Scrapes a web page and its "Next" pages for URLs using a browser leased from the pool.
+
+    Args:
+        url (str): The URL of the web page to scrape.
+        max_attempts (int): How many browsers to try if one crashes mid-site.
+
+    Returns:
+        list: A list of unique URLs extracted from the pages.
+    """
+    for attempt in range(1, max_attempts + 1):
+        browser = None
+        try:
+            with browser_pool.lease() as browser:
+                return _scrape_with_browser(browser, url)
+        except WebDriverException as e:
+            # Only a crash is retried; the pool has already discarded the crashed browser
+            if browser is None or not browser.broken or attempt == max_attempts:
+                raise
+            logger.warning(f"Browser crashed on {url} (attempt {attempt}/{max_attempts}), retrying: {e}")
+
+def _scrape_with_browser(browser, url):
+    driver = browser.driver
+    page_started = time.perf_counter()
     driver.get(url)
+    browser.record_page()
     
     urls = set()  # Use a set to avoid duplicates
     page_number = 1
@@ -28,6 +58,8 @@ def scrape_pagination(url):
         elements = driver.find_elements(By.XPATH, "//a[@href]")
         new_urls = [element.get_attribute('href') for element in elements if element.get_attribute('href')]
         urls.update(new_urls)  # Add new URLs to the set
+        SELENIUM_PAGES.inc()
+        SELENIUM_PAGE_SECONDS.observe(time.perf_counter() - page_started)
         
         try:
             # Try to find the next page button
@@ -35,19 +67,17 @@ def scrape_pagination(url):
                 EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Next') or contains(@class, 'next')]"))
             )
             driver.execute_script("arguments[0].scrollIntoView();", next_page)
+            page_started = time.perf_counter()
             next_page.click()
             time.sleep(2)  # Wait for the page to load
+            browser.record_page()
             page_number += 1
         except (TimeoutException, NoSuchElementException):
             print("No more pages or reached the end")
             break
 
-    driver.quit()
     return list(urls)  # Convert set back to list
 
-def save_to_json(data, filename):
-    with open(filename, 'w') as file:
-        json.dump(data, file, indent=4)
 # from selenium import webdriver
 # from selenium.webdriver.common.by import By
 # from selenium.webdriver.support.ui import WebDriverWait
@@ -1,56 +1,25 @@
-import os
+import hashlib
 import re
+import threading
+import time
 from groq import Groq
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from logging_config import logger
 from key_manager import key_manager
+from llm_dispatcher import rate_limiter, part_dispatcher
+from llm_cache import llm_cache
+from metrics import metrics
+from chunker import chunk_budget, chunk_content, count_tokens
 
 # Custom exception for rate limit issues
 class RateLimitException(Exception):
     pass
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=30, min=60, max=120),
-    retry=retry_if_exception_type(RateLimitException)
-)
-def run_groq_api(content,url, max_length=6000):
-    """
-    Sends content to the Groq API to extract and present press release and related content.
-
-    Args:
-        content (str): The text content to be processed.
-        url (str): The URL associated with the content (used for logging).
-        max_length (int): The maximum length of content chunks to be processed by the API.
-
-    Returns:
-        str: The processed content after extraction and formatting.
+MODEL = "llama3-8b-8192"
+# Completion tokens reserved per request when checking the per-key token budget
+EXPECTED_OUTPUT_TOKENS = 1024
 
-    Raises:
-        RateLimitException: If the API rate limit is exceeded.
-    """
-    try:
-        retry_state = run_groq_api.retry.statistics
-        attempt_number = retry_state['attempt_number'] if retry_state else 1
-
-        # Get the next available API key
-
-        api_key = key_manager.get_next_key()
-        client = Groq(api_key=api_key)
-        # Split content into manageable chunks
-
-        parts = [content[i:i+max_length] for i in range(0, len(content), max_length)]
-        results = []
-        for part in parts:
-            logger.info(f"Processing part for url:{url}")  # Log first 50 characters of part for reference
-            try:
-                # Request completion from Groq API
-
-                chat_completion = client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": f"""
+PROMPT_TEMPLATE = """
                                 Extract and present the press release, news, newsPage, press media, reports related content as follows:
                                 1. Provide the official reports, press release, newsPage, newsroom, news, press, press room, news feed, breaking news, newsletter, publication or similar content text exactly as it appears.
                                 2. List all links to separate reports, press releases, newsPage, newsroom, news, press, press room, news feed, breaking news, newsletters, or content.
@@ -71,32 +40,127 @@ def run_groq_api(content,url, max_length=6000):
                                 Content to analyze:
                                 {part}
                             """
-                        }
-                    ],
-                    model="llama3-8b-8192",
-                )
-                # Extract and clean up the result
-
-                result = chat_completion.choices[0].message.content
-                
-                # Remove introductory phrases
-                result = re.sub(r'^.*?(Here is|Here are).*?:\s*\n*', '', result, flags=re.IGNORECASE | re.DOTALL)
-                
-                results.append(result.strip())
-                logger.info(f"Successfully processed part url{url}")
-            except Exception as e:
-                logger.info(f"Retrying due to error:{url}")
-                key_manager.mark_key_as_used(api_key)
-
-                raise RateLimitException(str(e))
+
+# Changes whenever the prompt text changes, so cached results of an older prompt are never reused
+PROMPT_VERSION = hashlib.sha256(PROMPT_TEMPLATE.encode('utf-8')).hexdigest()[:16]
+llm_cache.invalidate(MODEL, keep_prompt_version=PROMPT_VERSION)
+
+# Content tokens that fit in one request next to the prompt and the expected completion
+CHUNK_TOKENS = chunk_budget(PROMPT_TEMPLATE, EXPECTED_OUTPUT_TOKENS)
+
+LLM_LATENCY = metrics.histogram('llm_request_seconds', 'Groq chat completion latency', ['outcome'])
+LLM_TOKENS = metrics.counter('llm_tokens_total', 'Tokens sent to and received from Groq', ['direction'])
+LLM_RATE_WAIT = metrics.histogram('llm_rate_limit_wait_seconds', 'Time spent waiting for a key with rate-limit capacity')
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(api_key):
+    """
+    Returns a cached Groq client for the API key so connections are reused across requests.
+    """
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = Groq(api_key=api_key)
+        return _clients[api_key]
+
+def estimate_tokens(text):
+    """
+    Token count used for rate limiting; the same estimate the chunker sizes the parts with.
+    """
+    return count_tokens(text)
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=30, min=60, max=120),
+    retry=retry_if_exception_type(RateLimitException)
+)
+def run_groq_part(part, url):
+    """
+    Sends a single content part to the Groq API using a key with free rate-limit capacity.
+    Parts already answered for the same prompt version and model are served from the cache.
+
+    Args:
+        part (str): The chunk of text content to be processed.
+        url (str): The URL associated with the content (used for logging).
+
+    Returns:
+        str: The processed part after removing introductory phrases.
+
+    Raises:
+        RateLimitException: If the API call fails, so the part is retried with another key.
+    """
+    cached = llm_cache.get(part, PROMPT_VERSION, MODEL)
+    if cached is not None:
+        logger.info(f"Cache hit for part of url:{url}")
+        return cached
+
+    retry_state = run_groq_part.retry.statistics
+    attempt_number = retry_state.get('attempt_number', 1) if retry_state else 1
+    prompt = PROMPT_TEMPLATE.format(part=part)
+    # Wait for a key with room in its request and token buckets
+
+    with LLM_RATE_WAIT.time():
+        api_key = rate_limiter.acquire(estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS)
+    logger.info(f"Processing part for url:{url}")
+    started = time.perf_counter()
+    try:
+        # Request completion from Groq API
+
+        chat_completion = get_client(api_key).chat.completions.create(
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            model=MODEL,
+        )
+        LLM_LATENCY.observe(time.perf_counter() - started, outcome='ok')
+        usage = getattr(chat_completion, 'usage', None)
+        if usage is not None:
+            LLM_TOKENS.inc(usage.prompt_tokens or 0, direction='in')
+            LLM_TOKENS.inc(usage.completion_tokens or 0, direction='out')
+        # Extract and clean up the result
+
+        result = chat_completion.choices[0].message.content
         
-        # Combine results and remove any remaining introductory phrases
-        combined_result = ' '.join(results)
-        final_result = re.sub(r'^.*?(Here is|Here are).*?:\s*\n*', '', combined_result, flags=re.IGNORECASE | re.DOTALL)
+        # Remove introductory phrases
+        result = re.sub(r'^.*?(Here is|Here are).*?:\s*\n*', '', result, flags=re.IGNORECASE | re.DOTALL)
+        logger.info(f"Successfully processed part url{url}")
+        result = result.strip()
+        llm_cache.put(part, PROMPT_VERSION, MODEL, result)
+        return result
     except Exception as e:
+        LLM_LATENCY.observe(time.perf_counter() - started, outcome='error')
         logger.error(f"Error on attempt {attempt_number} for URL {url}: {str(e)}")
         key_manager.mark_key_as_used(api_key)
-        raise RateLimitException(str(e))    
-    return final_result.strip()
+        raise RateLimitException(str(e))
+
+def run_groq_api(content, url, headings=None, max_tokens=CHUNK_TOKENS):
+    """
+    Sends content to the Groq API to extract and present press release and related content.
+    The content is packed into as few token-bounded chunks as possible, split at heading and
+    sentence boundaries; the chunks are sent concurrently and reassembled in their original order.
 
+    Args:
+        content (str): The text content to be processed.
+        url (str): The URL associated with the content (used for logging).
+        headings (dict): Heading text to link map from the spider, used as chunk boundaries.
+        max_tokens (int): The maximum number of content tokens in one chunk.
 
+    Returns:
+        str: The processed content after extraction and formatting.
+
+    Raises:
+        RateLimitException: If a part still fails after all retries.
+    """
+    # Split content into chunks that fill the model context
+
+    parts = chunk_content(content, max_tokens, headings)
+    results = part_dispatcher.map(lambda part: run_groq_part(part, url), parts)
+    
+    # Combine results and remove any remaining introductory phrases
+    combined_result = ' '.join(results)
+    final_result = re.sub(r'^.*?(Here is|Here are).*?:\s*\n*', '', combined_result, flags=re.IGNORECASE | re.DOTALL)
+    return final_result.strip()
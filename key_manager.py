@@ -1,10 +1,14 @@
 import os
 import json
+import threading
 from dotenv import load_dotenv
 from logging_config import logger
+from metrics import metrics
 
 load_dotenv()
 
+KEY_ROTATIONS = metrics.counter('llm_key_rotations_total', 'API keys moved to the used list after a failed request')
+
 class KeyManager:
     def __init__(self):
         """
@@ -34,6 +38,19 @@ class KeyManager:
             self.used_keys = []
 
         self.current_key_index = 0
+        # Guards the key lists, which are shared by the concurrent LLM workers
+        self.lock = threading.RLock()
+
+    def get_active_keys(self):
+        """
+        Return a snapshot of the currently active API keys, resetting used keys if none are left.
+        :return: A list of API keys.
+        """
+        with self.lock:
+            if not self.api_keys:
+                logger.info("No available keys, resetting used keys")
+                self.reset_used_keys()
+            return list(self.api_keys)
 
     def get_next_key(self):
         """
@@ -41,6 +58,10 @@ class KeyManager:
         If no keys are available, it resets used keys. Cycles through keys and increments the current index.
         :return: The next API key as a string.
         """
+        with self.lock:
+            return self._get_next_key()
+
+    def _get_next_key(self):
         if not self.api_keys:
             logger.info("No available keys, resetting used keys")
             self.reset_used_keys()
@@ -62,11 +83,16 @@ class KeyManager:
         If the number of used keys reaches 30, it resets the used keys.
         :param key: The API key to mark as used.
         """
+        with self.lock:
+            self._mark_key_as_used(key)
+
+    def _mark_key_as_used(self, key):
         if key in self.api_keys:
             # Move the key from active to used keys list
 
             self.api_keys.remove(key)
             self.used_keys.append(key)
+            KEY_ROTATIONS.inc()
             logger.info(f"Marked key {key[:5]}...{key[-5:]} as used")
             logger.info(f"Total keys in used_keys: {len(self.used_keys)}")
             self.update_env_file()
@@ -82,14 +108,15 @@ class KeyManager:
         Reset the used keys list by merging it back with the active keys list.
         This function is called when there are no more active keys or the used keys list reaches a threshold.
         """
-        logger.info("Resetting used keys")
-        # Move all used keys back to active keys
+        with self.lock:
+            logger.info("Resetting used keys")
+            # Move all used keys back to active keys
 
-        self.api_keys.extend(self.used_keys)
-        self.used_keys.clear()
-        logger.info(f"After reset: {len(self.api_keys)} active keys, {len(self.used_keys)} used keys")
+            self.api_keys.extend(self.used_keys)
+            self.used_keys.clear()
+            logger.info(f"After reset: {len(self.api_keys)} active keys, {len(self.used_keys)} used keys")
 
-        self.update_env_file()
+            self.update_env_file()
 
     def update_env_file(self):
         """
@@ -0,0 +1,147 @@
+import os
+import re
+from urllib.parse import urljoin, urldefrag
+import requests
+from requests.adapters import HTTPAdapter
+import lxml.etree
+import lxml.html
+from logging_config import logger
+from metrics import metrics
+
+# Pages with fewer anchors or less visible text than this are treated as JS-rendered
+MIN_ANCHORS = int(os.getenv("DISCOVERY_MIN_ANCHORS", "10"))
+MIN_BODY_TEXT = int(os.getenv("DISCOVERY_MIN_BODY_TEXT", "200"))
+MAX_STATIC_PAGES = int(os.getenv("DISCOVERY_MAX_STATIC_PAGES", "50"))
+
+DISCOVERY_SITES = metrics.counter('discovery_sites_total', 'Sites whose links were discovered, by method', ['method'])
+STATIC_PAGES = metrics.counter('discovery_http_pages_total', 'Pages fetched over plain HTTP for link discovery')
+
+# Markers left in the raw HTML by client-side rendering frameworks; reported with the reason a page needs the browser
+FRAMEWORK_MARKERS = re.compile(
+    r'__NEXT_DATA__|window\.__NUXT__|ng-version=|data-reactroot|data-server-rendered|'
+    r'<div id="(?:root|app|__next)">\s*</div>|enable javascript',
+    re.IGNORECASE
+)
+
+# One pooled HTTP session shared by all worker threads
+http_session = requests.Session()
+http_session.mount('http://', HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=2))
+http_session.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=2))
+http_session.headers.update({'User-Agent': 'YourBot/0.1 (+http://www.yourdomain.com)'})
+
+
+def parse_page(html, url):
+    """
+    Parses raw HTML and extracts absolute links and the rel=next link.
+
+    Args:
+        html (bytes): The raw HTML of the page; bytes let lxml honour the declared charset.
+        url (str): The URL the page was fetched from, used to resolve relative links.
+
+    Returns:
+        tuple: (doc, links, next_url) where doc is the lxml document, links a list of absolute
+        http(s) URLs and next_url the absolute rel=next URL or None.
+    """
+    doc = lxml.html.fromstring(html)
+    base = doc.xpath('string(//base/@href)') or url
+    links = []
+    for href in doc.xpath('//a/@href'):
+        link = urldefrag(urljoin(base, href.strip()))[0]
+        if link.startswith(('http://', 'https://')):
+            links.append(link)
+
+    next_href = doc.xpath('string((//link[@rel="next"]/@href | //a[@rel="next"]/@href)[1])')
+    next_url = urljoin(base, next_href.strip()) if next_href else None
+    return doc, links, next_url
+
+
+def looks_js_rendered(html, doc, links):
+    """
+    Decides whether a page probably needs a browser to render its links.
+
+    Args:
+        html (str): The raw HTML of the page.
+        doc: The parsed lxml document.
+        links (list): The links found in the raw HTML.
+
+    Returns:
+        str: The reason the page looks JS-rendered, or None if the static HTML is usable.
+    """
+    if len(links) < MIN_ANCHORS:
+        reason = f"only {len(links)} anchors"
+    else:
+        body = doc.find('body')
+        body_text = body.text_content() if body is not None else ''
+        if len(' '.join(body_text.split())) >= MIN_BODY_TEXT:
+            # Server-rendered pages carry the same markers, so they only matter once the content checks fail
+            return None
+        reason = "empty body"
+    marker = FRAMEWORK_MARKERS.search(html)
+    if marker:
+        reason += f", framework marker {marker.group(0)!r}"
+    return reason
+
+
+def scrape_static(url, max_pages=MAX_STATIC_PAGES):
+    """
+    Collects links with plain HTTP requests, following rel=next pagination.
+
+    Args:
+        url (str): The URL of the first page.
+        max_pages (int): Maximum number of rel=next pages to follow.
+
+    Returns:
+        tuple: (urls, pages, reason) where urls is the list of unique links, pages the number of
+        pages fetched and reason is set when the first page needs the browser instead.
+    """
+    urls = set()
+    seen_pages = set()
+    page_url = url
+
+    while page_url and page_url not in seen_pages and len(seen_pages) < max_pages:
+        seen_pages.add(page_url)
+        response = http_session.get(page_url, timeout=15)
+        STATIC_PAGES.inc()
+        response.raise_for_status()
+        if 'html' not in response.headers.get('Content-Type', 'text/html'):
+            return [], len(seen_pages), "non-HTML response"
+
+        doc, links, next_url = parse_page(response.content, response.url)
+        if len(seen_pages) == 1:
+            # Only the first page decides whether the site needs the browser
+            reason = looks_js_rendered(response.text, doc, links)
+            if reason:
+                return [], 1, reason
+        urls.update(links)
+        page_url = next_url
+
+    return list(urls), len(seen_pages), None
+
+
+def discover_links(url):
+    """
+    Discovers the links of a site over plain HTTP first and falls back to Selenium
+    when the page looks JS-rendered or the HTTP fetch fails.
+
+    Args:
+        url (str): The URL of the web page to scrape.
+
+    Returns:
+        dict: {'urls': list, 'method': 'http' or 'browser', 'pages': int, 'reason': str or None}
+    """
+    try:
+        urls, pages, reason = scrape_static(url)
+    except (requests.RequestException, ValueError, lxml.etree.ParserError) as e:
+        urls, pages, reason = [], 0, f"HTTP fetch failed: {e}"
+
+    if reason is None:
+        logger.info(f"Discovered {len(urls)} links for {url} over HTTP from {pages} pages")
+        DISCOVERY_SITES.inc(method='http')
+        return {'urls': urls, 'method': 'http', 'pages': pages, 'reason': None}
+
+    logger.info(f"Escalating {url} to the browser: {reason}")
+    # Imported lazily so static-only runs never load Selenium
+    from extract_links import scrape_pagination
+    urls = scrape_pagination(url)
+    DISCOVERY_SITES.inc(method='browser')
+    return {'urls': urls, 'method': 'browser', 'pages': None, 'reason': reason}
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from logging_config import logger
+from metrics import metrics
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'outputs', 'llm_cache.sqlite')
+
+CACHE_LOOKUPS = metrics.counter('llm_cache_lookups_total', 'LLM result cache lookups', ['result'])
+
+
+class LLMCache:
+    def __init__(self, path=None, max_bytes=None):
+        """
+        Initialize the LLMCache class.
+        Results are stored in SQLite, keyed by a hash of the normalized chunk text, the prompt version and the model.
+        :param path: Path of the SQLite file (LLM_CACHE_PATH).
+        :param max_bytes: Size limit of the stored results before the least recently used are evicted (LLM_CACHE_MAX_MB).
+        """
+        self.path = path or os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.max_bytes = max_bytes or int(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                prompt_version TEXT NOT NULL,
+                model TEXT NOT NULL,
+                result TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+
+    @staticmethod
+    def make_key(text, prompt_version, model):
+        """
+        Build the cache key; whitespace differences in the text do not change it.
+        """
+        normalized = ' '.join(text.split())
+        return hashlib.sha256(f"{model}\0{prompt_version}\0{normalized}".encode('utf-8')).hexdigest()
+
+    def get(self, text, prompt_version, model):
+        """
+        Look up a cached result and mark it as recently used.
+        :return: The cached result string, or None on a miss.
+        """
+        key = self.make_key(text, prompt_version, model)
+        with self.lock:
+            row = self.conn.execute("SELECT result FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                CACHE_LOOKUPS.inc(result='miss')
+                return None
+            self.conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            CACHE_LOOKUPS.inc(result='hit')
+            return row[0]
+
+    def put(self, text, prompt_version, model, result):
+        """
+        Store a result and evict the least recently used entries if the cache is over its size limit.
+        """
+        key = self.make_key(text, prompt_version, model)
+        size = len(result.encode('utf-8'))
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, prompt_version, model, result, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, prompt_version, model, result, size, time.time())
+            )
+            self.total_bytes += size - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Evict down to 90% of the limit so eviction does not run on every put
+        target = self.max_bytes * 0.9
+        evicted = 0
+        while self.total_bytes > target:
+            rows = self.conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            self.conn.execute("BEGIN")
+            for key, size in rows:
+                self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.total_bytes -= size
+                evicted += 1
+                if self.total_bytes <= target:
+                    break
+            self.conn.execute("COMMIT")
+        logger.info(f"LLM cache evicted {evicted} entries, {self.total_bytes} bytes remain")
+
+    def invalidate(self, model, keep_prompt_version=None):
+        """
+        Delete cached results of a model, except those made with keep_prompt_version.
+        Called with the current prompt version it drops everything made with older prompt text.
+        :return: Number of entries deleted.
+        """
+        with self.lock:
+            if keep_prompt_version is None:
+                cursor = self.conn.execute("DELETE FROM llm_cache WHERE model = ?", (model,))
+            else:
+                cursor = self.conn.execute(
+                    "DELETE FROM llm_cache WHERE model = ? AND prompt_version != ?", (model, keep_prompt_version)
+                )
+            self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if cursor.rowcount:
+            logger.info(f"LLM cache invalidated {cursor.rowcount} entries for {model}")
+        return cursor.rowcount
+
+    def stats(self):
+        """
+        :return: Dictionary with hit and miss counters, number of entries and stored bytes.
+        """
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': self.total_bytes}
+
+
+# Instantiate LLMCache; shared by all threads and sites in the process
+
+llm_cache = LLMCache()
@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+from logging_config import logger
+from key_manager import key_manager
+
+# Groq limits for llama3-8b-8192, per API key
+REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "30000"))
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second):
+        """
+        Initialize the TokenBucket class. The bucket starts full.
+        :param capacity: Maximum number of tokens the bucket can hold.
+        :param refill_per_second: Tokens added back per second.
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def wait_time(self, amount):
+        """
+        Seconds until the bucket holds enough tokens for the amount.
+        :param amount: Number of tokens wanted.
+        :return: 0 if the tokens are available now, otherwise the time to wait.
+        """
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount):
+        """
+        Take tokens out of the bucket. Call only after wait_time returned 0.
+        :param amount: Number of tokens to take.
+        """
+        self.tokens -= min(amount, self.capacity)
+
+
+class KeyRateLimiter:
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+        """
+        Initialize the KeyRateLimiter class.
+        Keeps a requests-per-minute and a tokens-per-minute bucket for every API key.
+        :param requests_per_minute: Request limit of a single key.
+        :param tokens_per_minute: Token limit of a single key.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.next_index = 0
+
+    def _buckets_for(self, key):
+        if key not in self.buckets:
+            self.buckets[key] = (
+                TokenBucket(self.requests_per_minute, self.requests_per_minute / 60),
+                TokenBucket(self.tokens_per_minute, self.tokens_per_minute / 60)
+            )
+        return self.buckets[key]
+
+    def acquire(self, tokens):
+        """
+        Block until some active key has room for one request of the given size and reserve it.
+        Keys are tried round-robin so the load spreads over all of them.
+        :param tokens: Estimated prompt plus completion tokens of the request.
+        :return: The API key to use for the request.
+        """
+        while True:
+            keys = key_manager.get_active_keys()
+            if not keys:
+                raise RuntimeError("No Groq API keys configured")
+            with self.lock:
+                shortest_wait = None
+                for offset in range(len(keys)):
+                    key = keys[(self.next_index + offset) % len(keys)]
+                    request_bucket, token_bucket = self._buckets_for(key)
+                    wait = max(request_bucket.wait_time(1), token_bucket.wait_time(tokens))
+                    if wait == 0:
+                        request_bucket.consume(1)
+                        token_bucket.consume(tokens)
+                        self.next_index = (self.next_index + offset + 1) % len(keys)
+                        return key
+                    if shortest_wait is None or wait < shortest_wait:
+                        shortest_wait = wait
+            # Sleep outside the lock, capped so newly reset keys are picked up quickly
+            time.sleep(min(shortest_wait, 1.0))
+
+
+class LLMDispatcher:
+    def __init__(self, max_workers, max_pending=None):
+        """
+        Initialize the LLMDispatcher class.
+        :param max_workers: Number of requests that may be in flight at once.
+        :param max_pending: Number of submitted but unfinished tasks before submit blocks (twice max_workers by default).
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self.pending = threading.BoundedSemaphore(max_pending or max_workers * 2)
+
+    def submit(self, fn, item):
+        """
+        Schedule fn(item), blocking while max_pending tasks are unfinished so a fast producer
+        is held back by the LLM stage instead of queueing without limit.
+        :return: A Future with the result.
+        """
+        self.pending.acquire()
+        try:
+            future = self.executor.submit(fn, item)
+        except Exception:
+            self.pending.release()
+            raise
+        future.add_done_callback(lambda _: self.pending.release())
+        return future
+
+    def map(self, fn, items, return_exceptions=False, desc=None):
+        """
+        Run fn over items concurrently and return the results in input order.
+
+        Args:
+            fn (callable): Function called with each item.
+            items (iterable): The inputs.
+            return_exceptions (bool): Put raised exceptions in the result list instead of raising the first one.
+            desc (str): If set, show a tqdm progress bar with this description.
+
+        Returns:
+            list: The results, in the same order as items.
+        """
+        futures = [self.executor.submit(fn, item) for item in items]
+        completed = as_completed(futures)
+        if desc:
+            completed = tqdm(completed, total=len(futures), desc=desc)
+        for _ in completed:
+            pass
+
+        results = []
+        for future in futures:
+            error = future.exception()
+            if error is None:
+                results.append(future.result())
+            elif return_exceptions:
+                results.append(error)
+            else:
+                raise error
+        return results
+
+
+# Shared limiter and dispatchers; items and their parts use separate pools so an item
+# waiting on its parts can never starve the pool the parts run on
+
+rate_limiter = KeyRateLimiter()
+item_dispatcher = LLMDispatcher(max_workers=int(os.getenv("LLM_ITEM_WORKERS", "4")))
+part_dispatcher = LLMDispatcher(max_workers=int(os.getenv("LLM_PART_WORKERS", "8")))
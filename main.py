@@ -1,23 +1,26 @@
 
 import logging
-from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 from excel_operations import read_input_file
-from url_processing import process_url
+from url_processing import build_site_pipeline, new_site_job
+from work_queue import WorkQueue, default_worker_id
 from logging_config import logger
-import concurrent.futures
+from metrics import metrics
+from profiling import enable_profiling
+import os
+import sys
 
 
 if __name__ == "__main__":
+    # Profile every stage and spider callback into the site output directories (same as PROFILE=1)
+    if '--profile' in sys.argv[1:]:
+        enable_profiling()
     # Define the input file containing URLs
 
-    input_filename = 'input_urls.xlsx'
+    input_filename = os.getenv("INPUT_FILE", 'input_urls.xlsx')
     # Read the input file into a DataFrame
 
     url_df = read_input_file(input_filename)
-    # Slice the DataFrame to process a specific range of URLs
-
-    url_df = url_df[1:2].copy() #it means need to read 1st 2 rows
     # Initialize counters
 
     successful_websites = 0
@@ -28,44 +31,90 @@ if __name__ == "__main__":
         logger.error("Failed to read input file. Please check the file format and try again.")
         print("Failed to read input file. Please check the file format and try again.")
     else:
-        # Get the total number of websites to process
-        total_websites = len(url_df)
+        # Queue the input rows; every worker process can do this, rows already queued are left alone
+        #start more processes on this machine to scale out (see WorkQueue for sharing WORK_QUEUE_PATH across machines)
+        work_queue = WorkQueue()
+        work_queue.enqueue(url_df['parent_url'].dropna().astype(str))
+        work_queue.reclaim_expired()
+        # With RECRAWL_AFTER set, sites finished longer ago than that are queued again for an incremental recrawl
+        work_queue.requeue_done()
+        worker_id = default_worker_id()
+        counts = work_queue.counts()
+        # Other workers take part of the pending rows, so progress is counted against the sites this worker claimed
+        claimed_websites = 0
         total_time = 0
         successful_websites = 0
-        # Use ThreadPoolExecutor to process URLs concurrently
-        #you can increase the worker value according to your system
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            # Submit tasks to the thread pool
-
-            futures = [executor.submit(process_url, row) for _, row in url_df.iterrows()]
-            # Iterate over the completed futures
-
-            for future in tqdm(concurrent.futures.as_completed(futures), total=total_websites, desc="Processing websites"):
-                start_url, website_time, success = future.result()
-                processed_websites += 1
-                remaining_websites = total_websites - processed_websites
-                # Update counters and log results
-
-                if success:
-                    total_time += website_time
-                    successful_websites += 1
-                    tqdm.write(f"Processed {start_url} in {website_time:.2f} seconds")
-                    logger.info(f"Successfully processed parent URL: {start_url} in {website_time:.2f} seconds")
-
-                else:
-                    tqdm.write(f"Skipped or error processing {start_url}")
-                # Log progress
-
-                logger.info(f"Progress: {processed_websites}/{total_websites} parent URLs processed. {remaining_websites} remaining.")
-                tqdm.write(f"Progress: {processed_websites}/{total_websites} parent URLs processed. {remaining_websites} remaining.")
+        logger.info(f"Worker {worker_id} starting; queue: {counts}")
+        # Run the claimed sites through the staged pipeline; each stage has its own worker pool
+        #you can change the workers per stage with the PIPELINE_*_WORKERS environment variables
+        heartbeat = work_queue.keep_alive(worker_id)
+        # Expose live metrics for Prometheus; set METRICS_PORT=0 to turn the endpoint off
+        metrics.start_http_server()
+        pipeline = build_site_pipeline().start()
+
+        def claimed_jobs():
+            global claimed_websites
+            for parent_url in work_queue.iter_claims(worker_id):
+                claimed_websites += 1
+                yield new_site_job(parent_url)
+
+        # Claim a site only when a discover worker is free, so this worker never holds leases it cannot start on
+        pipeline.feed(claimed_jobs(), on_demand=True)
+        # Iterate over the sites as they leave the pipeline
+
+        for result in tqdm(pipeline.results(), desc="Processing websites"):
+            start_url = result.job['start_url']
+            website_time = result.busy_seconds
+            processed_websites += 1
+            # Finish the lease only if every stage is recorded in the site's manifest; otherwise give it back,
+            #so a later claim resumes from the checkpoint (counted as an attempt, so it cannot loop forever)
+
+            manifest = result.job.get('manifest')
+            if result.error is not None:
+                work_queue.release(worker_id, start_url, error=result.error)
+            elif result.completed and not manifest.is_complete('exported'):
+                work_queue.release(worker_id, start_url, error="Stages left incomplete: some pages failed classification")
+            else:
+                work_queue.complete(worker_id, start_url)
+            counts = work_queue.counts()
+            remaining_websites = counts.get('pending', 0) + counts.get('leased', 0)
+            # Update counters and log results
+
+            if result.completed:
+                total_time += website_time
+                successful_websites += 1
+                tqdm.write(f"Processed {start_url} in {website_time:.2f} seconds")
+                logger.info(f"Successfully processed parent URL: {start_url} in {website_time:.2f} seconds")
+
+            elif result.error is not None:
+                tqdm.write(f"Error processing {start_url} in stage {result.stage}: {result.error}")
+                logger.error(f"Error processing {start_url} in stage {result.stage}: {result.error}")
+            else:
+                tqdm.write(f"Skipped {start_url} - already processed")
+            # Log progress
+
+            logger.info(f"Progress: {processed_websites}/{claimed_websites} claimed parent URLs processed. {remaining_websites} remaining in the queue.")
+            tqdm.write(f"Progress: {processed_websites}/{claimed_websites} claimed parent URLs processed. {remaining_websites} remaining in the queue.")
+        heartbeat.set()
+        logger.info(f"Worker {worker_id} finished; queue: {work_queue.counts()}")
+        # Log how busy each stage was
+
+        logger.info(f"Pipeline stages: {pipeline.report()}")
+        print(f"\nPipeline stages: {pipeline.format_report()}")
         # Calculate and log performance metrics
 
         avg_time = total_time / successful_websites if successful_websites > 0 else 0
-        logger.info(f"Total websites processed: {successful_websites}/{total_websites}")
+        logger.info(f"Total websites processed: {successful_websites}/{claimed_websites}")
         logger.info(f"Total processing time: {total_time:.2f} seconds")
         logger.info(f"Average time per website: {avg_time:.2f} seconds")
         # Print performance metrics
 
-        print(f"\nTotal websites processed: {successful_websites}/{total_websites}")
+        print(f"\nTotal websites processed: {successful_websites}/{claimed_websites}")
         print(f"Total processing time: {total_time:.2f} seconds")
         print(f"Average time per website: {avg_time:.2f} seconds")
+        # Save the counters, gauges and latency histograms of this run
+
+        metrics_file = metrics.write_summary()
+        if metrics_file:
+            logger.info(f"Metrics summary written to {metrics_file}")
+            print(f"Metrics summary: {metrics_file}")
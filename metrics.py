@@ -0,0 +1,350 @@
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging_config import logger
+
+# Local port serving /metrics (Prometheus text) and /metrics.json; 0 disables the server
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+# Directory receiving the JSON summary of each run
+METRICS_DIR = os.getenv("METRICS_DIR", "outputs")
+
+# Latency buckets in seconds, from a fast parse to a slow Selenium site
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key)) + list(extra or [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Initialize the Metric class.
+        :param name: Prometheus metric name.
+        :param documentation: One-line help text.
+        :param labelnames: Names of the labels every observation has to carry.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        return _label_key(self.labelnames, labels)
+
+    def samples(self):
+        with self.lock:
+            return dict(self.values)
+
+    def clear(self):
+        """
+        Drop every label set, e.g. before a collector sets the ones that still exist.
+        """
+        with self.lock:
+            self.values.clear()
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self.samples().items())]
+
+    def summarize(self, elapsed):
+        return {
+            ','.join(key) or 'total': {'value': value, 'per_second': round(value / elapsed, 3) if elapsed else 0.0}
+            for key, value in sorted(self.samples().items())
+        }
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self.samples().items())]
+
+    def summarize(self, elapsed):
+        return {','.join(key) or 'total': value for key, value in sorted(self.samples().items())}
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        Initialize the Histogram class.
+        :param name: Prometheus metric name.
+        :param documentation: One-line help text.
+        :param labelnames: Names of the labels every observation has to carry.
+        :param buckets: Sorted upper bounds of the buckets; +Inf is added.
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0, 'max': 0.0}
+            entry['counts'][index] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+            entry['max'] = max(entry['max'], value)
+
+    def time(self, **labels):
+        """
+        :return: A context manager observing the seconds spent in its block.
+        """
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self.lock:
+            return {key: {'counts': list(entry['counts']), 'sum': entry['sum'], 'count': entry['count'],
+                          'max': entry['max']}
+                    for key, entry in self.values.items()}
+
+    def render(self):
+        lines = []
+        for key, entry in sorted(self.samples().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry['counts']):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(entry['sum'])}")
+            lines.append(f"{self.name}_count{labels} {entry['count']}")
+        return lines
+
+    def _quantile(self, entry, q):
+        # Upper bound of the bucket holding the quantile, capped at the largest value seen
+        rank = q * entry['count']
+        cumulative = 0
+        for bound, count in zip(self.buckets, entry['counts']):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, entry['max'])
+        return entry['max']
+
+    def summarize(self, elapsed):
+        summary = {}
+        for key, entry in sorted(self.samples().items()):
+            count = entry['count']
+            summary[','.join(key) or 'total'] = {
+                'count': count,
+                'sum': round(entry['sum'], 3),
+                'avg': round(entry['sum'] / count, 4) if count else 0.0,
+                'p50': round(self._quantile(entry, 0.5), 4),
+                'p95': round(self._quantile(entry, 0.95), 4),
+                'max': round(entry['max'], 4),
+                'per_second': round(count / elapsed, 3) if elapsed else 0.0,
+            }
+        return summary
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Initialize the MetricsRegistry class.
+        Holds the process-wide counters, gauges and histograms. Registering a name twice returns the
+        existing metric, so modules can declare their metrics at import time in any order.
+        """
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = []
+        self.started_at = time.time()
+        self.server = None
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with another type or labels")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, collector):
+        """
+        Register a callable run before every export, e.g. to set gauges from queue sizes.
+        """
+        with self.lock:
+            self.collectors.append(collector)
+
+    def remove_collector(self, collector):
+        with self.lock:
+            if collector in self.collectors:
+                self.collectors.remove(collector)
+
+    def _collect(self):
+        with self.lock:
+            collectors = list(self.collectors)
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return metrics
+
+    def render_prometheus(self):
+        """
+        :return: All metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._collect():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """
+        :return: Dictionary of metric name to its values per label set; counters and histograms also
+            carry a per-second rate over the run.
+        """
+        metrics = self._collect()
+        elapsed = time.time() - self.started_at
+        return {
+            'started_at': self.started_at,
+            'elapsed_seconds': round(elapsed, 2),
+            'metrics': {metric.name: metric.summarize(elapsed) for metric in metrics if metric.samples()},
+        }
+
+    def write_summary(self, path=None):
+        """
+        Write the JSON summary of the run.
+        :param path: Target file; defaults to METRICS_DIR/metrics_<start time>.json.
+        :return: The path written to, or None if writing failed.
+        """
+        if path is None:
+            stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(self.started_at))
+            path = os.path.join(METRICS_DIR, f"metrics_{stamp}.json")
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(self.summary(), f, indent=2)
+            return path
+        except OSError as e:
+            logger.error(f"Could not write metrics summary to {path}: {e}")
+            return None
+
+    def start_http_server(self, port=METRICS_PORT, host=METRICS_HOST):
+        """
+        Serve /metrics in the Prometheus text format and /metrics.json as the JSON summary from a daemon thread.
+        :param port: Port to listen on; 0 leaves the server off.
+        :return: The server, or None if it is disabled or the port is taken.
+        """
+        if not port or self.server is not None:
+            return self.server
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path in ('/', '/metrics'):
+                    body, content_type = registry.render_prometheus(), 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/metrics.json':
+                    body, content_type = json.dumps(registry.summary(), indent=2), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                # Scrapes every few seconds would flood the log
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Metrics server not started on {host}:{port}: {e}")
+            return None
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='metrics-http', daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return self.server
+
+    def stop_http_server(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+# Create a global instance of MetricsRegistry
+metrics = MetricsRegistry()
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import re
+from collections import Counter, OrderedDict
+
+FINGERPRINT_BITS = 64
+# Pages whose fingerprints differ in at most this many bits are near-duplicates
+MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "3"))
+# Fingerprints kept in the index; the oldest are forgotten beyond this
+MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "100000"))
+
+_WORD = re.compile(r'\w+')
+
+
+def simhash(text, shingle_size=3):
+    """
+    Computes a 64-bit SimHash of the text over word shingles.
+
+    Args:
+        text (str): The page content.
+        shingle_size (int): Number of consecutive words per feature.
+
+    Returns:
+        int: The fingerprint.
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = Counter([' '.join(words)])
+    else:
+        shingles = Counter(' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1))
+
+    vector = [0] * FINGERPRINT_BITS
+    for shingle, weight in shingles.items():
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(FINGERPRINT_BITS):
+            if value >> bit & 1:
+                vector[bit] += weight
+            else:
+                vector[bit] -= weight
+
+    fingerprint = 0
+    for bit, total in enumerate(vector):
+        if total > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    def __init__(self, max_distance=MAX_DISTANCE, max_entries=MAX_ENTRIES):
+        """
+        Initialize the NearDuplicateIndex class.
+        Fingerprints are split into max_distance + 1 bands: two fingerprints within max_distance bits
+        must agree on at least one whole band, so only pages sharing a band are compared.
+        :param max_distance: Maximum Hamming distance of near-duplicates.
+        :param max_entries: Number of fingerprints kept before the oldest are evicted.
+        """
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.bands = max_distance + 1
+        self.band_bits = FINGERPRINT_BITS // self.bands
+        self.entries = OrderedDict()  # key -> (fingerprint, representative key)
+        self.buckets = {}
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self.band_bits) - 1
+        return [(band, fingerprint >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def _evict_oldest(self):
+        key, (fingerprint, _) = self.entries.popitem(last=False)
+        for band_key in self._band_keys(fingerprint):
+            bucket = self.buckets.get(band_key)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band_key]
+
+    def add(self, key, fingerprint):
+        """
+        Add a page and return the representative of its cluster.
+        :param key: Identifier of the page, such as its URL.
+        :param fingerprint: SimHash of the page content.
+        :return: The key of an earlier near-duplicate's representative, or key itself if the page is new.
+        """
+        band_keys = self._band_keys(fingerprint)
+        representative = key
+        for band_key in band_keys:
+            for other in self.buckets.get(band_key, ()):
+                other_fingerprint, other_representative = self.entries[other]
+                if hamming_distance(fingerprint, other_fingerprint) <= self.max_distance:
+                    representative = other_representative
+                    break
+            if representative != key:
+                break
+
+        if key in self.entries:
+            return self.entries[key][1]
+        self.entries[key] = (fingerprint, representative)
+        for band_key in band_keys:
+            self.buckets.setdefault(band_key, set()).add(key)
+        if len(self.entries) > self.max_entries:
+            self._evict_oldest()
+        return representative
+
+
+def item_fingerprint(item):
+    """
+    Returns the SimHash of a scraped item's content. Computed by the consuming thread after boilerplate
+    removal, so the shared reactor thread never spends time on it.
+    """
+    return simhash(item.get('content', ''))
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from url_canonical import canonicalize_url
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(__file__), 'outputs', 'page_state.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_state (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    links TEXT,
+    accepted INTEGER,
+    result TEXT,
+    relevant INTEGER,
+    fetched_at REAL,
+    classified_at REAL
+);
+"""
+
+
+def body_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+class PageStateStore:
+    def __init__(self, path=None):
+        """
+        Initialize the PageStateStore class.
+        Remembers per URL the validators and body hash of the last fetch, the links followed from the page
+        with where each was found, whether the relevance filter passed it, and the last verdict, so a recrawl
+        can send conditional requests and reuse the verdict of pages that did not change. A verdict is only kept while the page keeps the content hash it was made for.
+        Pages are keyed by their canonical URL, so variants of a URL share one state.
+        :param path: Path of the SQLite file (PAGE_STATE_PATH).
+        """
+        self.path = path or os.getenv("PAGE_STATE_PATH", DEFAULT_STATE_PATH)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        # Stores created before the relevance filter result was kept lack its column
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(page_state)")}
+        if 'relevant' not in columns:
+            self.conn.execute("ALTER TABLE page_state ADD COLUMN relevant INTEGER")
+
+    def get(self, url):
+        """
+        :return: Dictionary with the stored state of the URL, or None if it was never fetched.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, content_hash, links, accepted, result, relevant FROM page_state WHERE url = ?",
+                (canonicalize_url(url),)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_hash, links, accepted, result, relevant = row
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_hash': content_hash,
+            'links': json.loads(links) if links else [],
+            'accepted': None if accepted is None else bool(accepted),
+            'result': result,
+            'relevant': None if relevant is None else bool(relevant),
+        }
+
+    def record_fetch(self, url, etag, last_modified, content_hash, links, relevant=None):
+        """
+        Store the validators, body hash, followed links and relevance filter result of a fetched page.
+        The stored verdict is dropped if the content hash changed.
+        :param relevant: Whether the page passed the relevance filter, or None if it was not scored.
+        """
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO page_state (url, etag, last_modified, content_hash, links, relevant, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET "
+                "accepted = CASE WHEN page_state.content_hash = excluded.content_hash THEN page_state.accepted END, "
+                "result = CASE WHEN page_state.content_hash = excluded.content_hash THEN page_state.result END, "
+                "etag = excluded.etag, last_modified = excluded.last_modified, content_hash = excluded.content_hash, "
+                "links = excluded.links, relevant = excluded.relevant, fetched_at = excluded.fetched_at",
+                (canonicalize_url(url), etag, last_modified, content_hash, json.dumps(links),
+                 None if relevant is None else int(relevant), time.time())
+            )
+
+    def record_verdicts(self, verdicts):
+        """
+        Store the verdicts of fetched pages in one transaction.
+        :param verdicts: Iterable of dictionaries with 'url', 'accepted' and 'result'.
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE page_state SET accepted = ?, result = ?, classified_at = ? WHERE url = ?",
+                ((int(verdict['accepted']), verdict.get('result'), now, canonicalize_url(verdict['url']))
+                 for verdict in verdicts)
+            )
+
+
+# Instantiate PageStateStore; shared by the spider and the pipeline stages
+
+page_state = PageStateStore()
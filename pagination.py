@@ -0,0 +1,95 @@
+import os
+import re
+from collections import defaultdict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Upper bound on the pages scheduled from one inferred template
+MAX_PAGES = int(os.getenv("PAGINATION_MAX_PAGES", "500"))
+
+# Query parameters that carry a page number; one-letter keys such as WordPress's ?p=<post id> are left out
+PAGE_PARAMS = {'page', 'pg', 'paged', 'pagenum', 'pageno', 'page_no', 'pagenumber', 'page_number', 'currentpage'}
+# Path segments such as /page/3/ or /news/pg/3
+PATH_PAGE = re.compile(r'^(?P<prefix>.*/(?:page|pg|seite|pagina)/)(?P<number>\d+)(?P<suffix>/?)$', re.IGNORECASE)
+# Distinct pagination links that have to share a template before pages are generated from it
+MIN_TEMPLATE_LINKS = 2
+
+
+class PageTemplate:
+    def __init__(self, kind, base, key, last):
+        """
+        Initialize the PageTemplate class.
+        :param kind: 'query' for ?page=N style URLs, 'path' for /page/N/ style URLs.
+        :param base: For 'query', (scheme, netloc, path, other query pairs); for 'path', (scheme, netloc, prefix, suffix, query).
+        :param key: The query parameter holding the page number ('query' only).
+        :param last: Highest page number seen among the links.
+        """
+        self.kind = kind
+        self.base = base
+        self.key = key
+        self.last = last
+
+    def url(self, number):
+        """
+        :return: The URL of page number.
+        """
+        if self.kind == 'query':
+            scheme, netloc, path, pairs = self.base
+            query = urlencode(list(pairs) + [(self.key, str(number))])
+            return urlunsplit((scheme, netloc, path, query, ''))
+        scheme, netloc, prefix, suffix, query = self.base
+        return urlunsplit((scheme, netloc, f"{prefix}{number}{suffix}", query, ''))
+
+    def urls(self, first=2, max_pages=MAX_PAGES):
+        """
+        :return: URLs of pages first to last, at most max_pages of them.
+        """
+        return [self.url(number) for number in range(first, min(self.last, first + max_pages - 1) + 1)]
+
+    def __repr__(self):
+        return f"PageTemplate({self.url('N')}, last={self.last})"
+
+
+def _template_key(url):
+    """
+    :return: (template key, page number) of a paginated URL, or None if no page number is found.
+    """
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    pairs = parse_qsl(parts.query, keep_blank_values=True)
+    for key, value in pairs:
+        if key.lower() in PAGE_PARAMS and value.isdigit():
+            others = tuple(sorted(pair for pair in pairs if pair[0] != key))
+            return ('query', (parts.scheme, parts.netloc, parts.path, others), key), int(value)
+    match = PATH_PAGE.match(parts.path)
+    if match:
+        return ('path', (parts.scheme, parts.netloc, match.group('prefix'), match.group('suffix'), parts.query), None), \
+            int(match.group('number'))
+    return None
+
+
+def infer_page_template(urls, min_links=MIN_TEMPLATE_LINKS):
+    """
+    Finds the page URL template shared by pagination links and the last page number they reveal.
+
+    Args:
+        urls (iterable): Absolute URLs of next/previous, page number and last-page links. The page's
+            own URL should not be included, since a single numbered URL is no evidence of pagination.
+        min_links (int): Distinct page numbers the template has to be seen with.
+
+    Returns:
+        PageTemplate: The template seen on the most links, or None if no template is shared by min_links links.
+    """
+    numbers = defaultdict(set)
+    for url in urls:
+        found = _template_key(url)
+        if found:
+            key, number = found
+            numbers[key].add(number)
+    if not numbers:
+        return None
+    (kind, base, key), seen = max(numbers.items(), key=lambda entry: len(entry[1]))
+    if len(seen) < min_links or max(seen) < 2:
+        return None
+    return PageTemplate(kind, base, key, max(seen))
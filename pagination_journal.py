@@ -0,0 +1,108 @@
+import json
+import os
+
+JOURNAL_NAME = 'pagination_journal.jsonl'
+SNAPSHOT_NAME = 'pagination_info.json'
+# Journal events between compactions into the snapshot file
+COMPACT_EVERY = int(os.getenv("PAGINATION_COMPACT_EVERY", "1000"))
+
+
+class PaginationJournal:
+    def __init__(self, output_dir, compact_every=COMPACT_EVERY):
+        """
+        Initialize the PaginationJournal class.
+        Pagination events are appended to a line-oriented journal instead of rewriting the whole
+        pagination_info.json on every response. The journal is folded into pagination_info.json every
+        compact_every events and on close, so the snapshot plus the journal always hold the full state.
+        :param output_dir: Directory holding pagination_info.json and the journal.
+        :param compact_every: Events between compactions; 0 compacts only on close.
+        """
+        self.output_dir = output_dir
+        self.journal_path = os.path.join(output_dir, JOURNAL_NAME)
+        self.snapshot_path = os.path.join(output_dir, SNAPSHOT_NAME)
+        self.compact_every = compact_every
+        self.events = 0
+        self.file = None
+
+    def _append(self, event):
+        if self.file is None:
+            os.makedirs(self.output_dir or '.', exist_ok=True)
+            self.file = open(self.journal_path, 'a', encoding='utf-8')
+        self.file.write(json.dumps(event, separators=(',', ':')) + '\n')
+        # Hand every event to the OS, so a crash of the process loses none of them
+        self.file.flush()
+        self.events += 1
+
+    def add_link(self, parent_url, link):
+        self._append({'p': parent_url, 'l': link})
+
+    def add_page(self, parent_url):
+        self._append({'p': parent_url, 'c': 1})
+
+    def should_compact(self):
+        return bool(self.compact_every) and self.events >= self.compact_every
+
+    def compact(self, pagination_info):
+        """
+        Write the full state to the snapshot file and empty the journal.
+        :param pagination_info: The current {parent_url: {'pagination_links', 'page_count'}} with lists.
+        """
+        os.makedirs(self.output_dir or '.', exist_ok=True)
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(pagination_info, f, indent=2)
+        os.replace(temp_path, self.snapshot_path)
+        # The snapshot is in place, so the events it covers can go
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        open(self.journal_path, 'w').close()
+        self.events = 0
+
+    def close(self, pagination_info):
+        self.compact(pagination_info)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+
+def interrupted(output_dir):
+    """
+    :return: True if a journal was left behind, i.e. the last crawl in output_dir did not close.
+    """
+    return os.path.exists(os.path.join(output_dir, JOURNAL_NAME))
+
+
+def load_pagination_info(output_dir):
+    """
+    Rebuilds the pagination info of a crawl from its snapshot and journal, e.g. after a crash.
+
+    Args:
+        output_dir (str): The crawl's output directory.
+
+    Returns:
+        dict: {parent_url: {'pagination_links': [...], 'page_count': n}}
+    """
+    pagination_info = {}
+    snapshot_path = os.path.join(output_dir, SNAPSHOT_NAME)
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, 'r') as f:
+            for parent_url, info in json.load(f).items():
+                pagination_info[parent_url] = {
+                    'pagination_links': dict.fromkeys(info.get('pagination_links', [])),
+                    'page_count': info.get('page_count', 0)
+                }
+    journal_path = os.path.join(output_dir, JOURNAL_NAME)
+    if os.path.exists(journal_path):
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                info = pagination_info.setdefault(event['p'], {'pagination_links': {}, 'page_count': 0})
+                if 'l' in event:
+                    info['pagination_links'][event['l']] = None
+                info['page_count'] += event.get('c', 0)
+    for info in pagination_info.values():
+        info['pagination_links'] = list(info['pagination_links'])
+    return pagination_info
@@ -0,0 +1,208 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+from logging_config import logger
+from metrics import metrics
+
+# Result of one job leaving the pipeline; completed is False if a stage dropped it (returned None) or raised
+PipelineResult = namedtuple('PipelineResult', ['job', 'completed', 'error', 'stage', 'busy_seconds'])
+
+_STOP = object()
+
+STAGE_SECONDS = metrics.histogram('pipeline_stage_seconds', 'Time a site spends in a pipeline stage', ['stage'])
+STAGE_JOBS = metrics.counter('pipeline_stage_jobs_total', 'Sites leaving a pipeline stage', ['stage', 'outcome'])
+STAGE_QUEUE = metrics.gauge('pipeline_stage_queue_depth', 'Sites waiting in front of a pipeline stage', ['stage'])
+STAGE_ACTIVE = metrics.gauge('pipeline_stage_active_workers', 'Workers of a pipeline stage running a site', ['stage'])
+
+
+class _Task:
+    def __init__(self, job):
+        self.job = job
+        self.busy_seconds = 0.0
+
+
+class Stage:
+    def __init__(self, name, fn, workers=1, queue_size=4):
+        """
+        Initialize the Stage class.
+        :param name: Name used in logs and reports.
+        :param fn: Called with a job; returns the job for the next stage, or None to drop it (e.g. already processed).
+        :param workers: Number of threads running fn.
+        :param queue_size: Jobs that may wait in front of the stage before the previous stage blocks.
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.busy_seconds = 0.0
+        self.processed = 0
+        self.failed = 0
+        self.running_workers = 0
+
+
+class StagedPipeline:
+    def __init__(self, stages, report_interval=30):
+        """
+        Initialize the StagedPipeline class.
+        Every stage has its own worker threads and a bounded input queue, so a slow stage holds back only
+        the stages feeding it while every other stage keeps its own resource busy.
+        :param stages: List of Stage objects, in order.
+        :param report_interval: Seconds between queue depth and utilization log lines; 0 disables them.
+        """
+        self.stages = stages
+        self.report_interval = report_interval
+        self.output = queue.Queue()
+        self.started_at = None
+        self.stopped = threading.Event()
+        # Free workers of the first stage, when jobs are fed on demand
+        self.intake = None
+
+    def start(self):
+        self.started_at = time.monotonic()
+        for index, stage in enumerate(self.stages):
+            stage.running_workers = stage.workers
+            for number in range(stage.workers):
+                threading.Thread(target=self._worker, args=(index,), name=f"{stage.name}-{number}", daemon=True).start()
+        metrics.add_collector(self._collect_metrics)
+        if self.report_interval:
+            threading.Thread(target=self._report_loop, name='pipeline-report', daemon=True).start()
+        return self
+
+    def _next_queue(self, index):
+        return self.stages[index + 1].queue if index + 1 < len(self.stages) else self.output
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        while True:
+            task = stage.queue.get()
+            if task is _STOP:
+                break
+            with stage.lock:
+                stage.active += 1
+            started = time.monotonic()
+            try:
+                result = stage.fn(task.job)
+                error = None
+            except Exception as e:
+                logger.error(f"Stage {stage.name} failed: {e}")
+                result, error = None, e
+            elapsed = time.monotonic() - started
+            task.busy_seconds += elapsed
+            with stage.lock:
+                stage.active -= 1
+                stage.busy_seconds += elapsed
+                stage.processed += 1
+                stage.failed += error is not None
+            STAGE_SECONDS.observe(elapsed, stage=stage.name)
+            STAGE_JOBS.inc(stage=stage.name, outcome='error' if error is not None else 'ok' if result is not None else 'dropped')
+
+            if index == 0 and self.intake is not None:
+                self.intake.release()
+            if result is None:
+                self.output.put(PipelineResult(task.job, False, error, stage.name, task.busy_seconds))
+            elif index + 1 == len(self.stages):
+                self.output.put(PipelineResult(result, True, None, stage.name, task.busy_seconds))
+            else:
+                task.job = result
+                self._next_queue(index).put(task)
+
+        # The last worker of a stage to stop passes the stop on to every worker of the next stage
+        with stage.lock:
+            stage.running_workers -= 1
+            last = stage.running_workers == 0
+        if last:
+            if index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    self.stages[index + 1].queue.put(_STOP)
+            else:
+                self.output.put(_STOP)
+
+    def submit(self, job):
+        """
+        Add a job to the first stage, blocking while its queue is full.
+        """
+        self.stages[0].queue.put(_Task(job))
+
+    def close(self):
+        """
+        Signal that no more jobs will be submitted; the stages finish the queued jobs and then stop.
+        """
+        for _ in range(self.stages[0].workers):
+            self.stages[0].queue.put(_STOP)
+
+    def feed(self, jobs, on_demand=False):
+        """
+        Submit jobs from a background thread and close the pipeline when they run out,
+        so the caller can consume results() at the same time.
+        :param on_demand: Take the next job from jobs only when a worker of the first stage is free, instead of
+            filling its queue ahead; for job sources with a cost per job taken, such as work queue leases.
+        """
+        if on_demand:
+            self.intake = threading.Semaphore(self.stages[0].workers)
+
+        def run():
+            try:
+                iterator = iter(jobs)
+                while True:
+                    if self.intake is not None:
+                        self.intake.acquire()
+                    job = next(iterator, _STOP)
+                    if job is _STOP:
+                        break
+                    self.submit(job)
+            finally:
+                self.close()
+        threading.Thread(target=run, name='pipeline-feed', daemon=True).start()
+
+    def results(self):
+        """
+        Yield a PipelineResult for every job as it leaves the pipeline, until the pipeline is closed and drained.
+        """
+        while True:
+            result = self.output.get()
+            if result is _STOP:
+                break
+            yield result
+        self.stopped.set()
+        self._collect_metrics()
+        metrics.remove_collector(self._collect_metrics)
+
+    def report(self):
+        """
+        :return: Dictionary of stage name to queue depth, active workers, processed and failed jobs and utilization,
+            where utilization is the share of the stage's worker time spent running jobs since start.
+        """
+        elapsed = max(time.monotonic() - self.started_at, 1e-9) if self.started_at else 0
+        report = {}
+        for stage in self.stages:
+            with stage.lock:
+                report[stage.name] = {
+                    'queue_depth': stage.queue.qsize(),
+                    'queue_size': stage.queue.maxsize,
+                    'workers': stage.workers,
+                    'active': stage.active,
+                    'processed': stage.processed,
+                    'failed': stage.failed,
+                    'busy_seconds': round(stage.busy_seconds, 2),
+                    'utilization': round(stage.busy_seconds / (stage.workers * elapsed), 3) if elapsed else 0.0,
+                }
+        return report
+
+    def format_report(self):
+        return ' | '.join(
+            f"{name}: queue {info['queue_depth']}/{info['queue_size']}, active {info['active']}/{info['workers']}, "
+            f"done {info['processed']}, util {info['utilization']:.0%}"
+            for name, info in self.report().items()
+        )
+
+    def _collect_metrics(self):
+        for stage in self.stages:
+            STAGE_QUEUE.set(stage.queue.qsize(), stage=stage.name)
+            STAGE_ACTIVE.set(stage.active, stage=stage.name)
+
+    def _report_loop(self):
+        while not self.stopped.wait(self.report_interval):
+            logger.info(f"Pipeline: {self.format_report()}")
@@ -0,0 +1,182 @@
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from logging_config import logger
+
+# Profiling mode: PROFILE=1 in the environment or --profile on the command line of main.py
+PROFILE_ENABLED = os.getenv("PROFILE", "0").lower() in ('1', 'true', 'yes')
+# Functions and allocation sites listed in each report
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "30"))
+PROFILE_DIR_NAME = 'profiles'
+
+_enabled = PROFILE_ENABLED
+_write_lock = threading.Lock()
+
+
+def enable_profiling():
+    """
+    Switch profiling on for this process and for Scrapy processes it starts.
+    Only stages and spiders created afterwards are profiled.
+    """
+    global _enabled
+    _enabled = True
+    os.environ["PROFILE"] = "1"
+
+
+def profiling_enabled():
+    return _enabled
+
+
+class ProfileSession:
+    def __init__(self, name, top_n=PROFILE_TOP_N):
+        """
+        Initialize the ProfileSession class.
+        Collects a cProfile profile of the code run through run() and the allocations made between
+        creation and write(). cProfile only sees the calling thread, while tracemalloc sees the whole
+        process, so the allocation report also counts work that other threads did at the same time.
+        :param name: Name of the profiled stage or callback, used for the file names.
+        :param top_n: Number of functions and allocation sites listed in the report.
+        """
+        self.name = name
+        self.top_n = top_n
+        self.profiler = cProfile.Profile()
+        self.depth = 0
+        self.cpu_available = True
+        self.started_at = time.perf_counter()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.memory_before = tracemalloc.take_snapshot()
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Call fn with the profiler enabled; nested calls keep the outermost enable.
+        """
+        if self.depth == 0 and self.cpu_available:
+            try:
+                self.profiler.enable()
+            except ValueError as e:
+                # Another profiler owns this thread (or, on newer Pythons, the process)
+                logger.warning(f"CPU profile of {self.name} skipped: {e}")
+                self.cpu_available = False
+        self.depth += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.depth -= 1
+            if self.depth == 0 and self.cpu_available:
+                self.profiler.disable()
+
+    def write(self, output_dir):
+        """
+        Write <name>.prof (load it with pstats or snakeviz) and <name>_top.txt, listing the top functions
+        by cumulative and own time and the allocation sites that grew the most, to output_dir/profiles.
+        :return: The path of the text report, or None if writing failed.
+        """
+        wall_seconds = time.perf_counter() - self.started_at
+        memory_after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        ignore = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        )
+        growth = memory_after.filter_traces(ignore).compare_to(self.memory_before.filter_traces(ignore), 'lineno')
+
+        profile_dir = os.path.join(output_dir, PROFILE_DIR_NAME)
+        prof_path = os.path.join(profile_dir, f"{self.name}.prof")
+        report_path = os.path.join(profile_dir, f"{self.name}_top.txt")
+        report = io.StringIO()
+        report.write(f"Profile of {self.name}: {wall_seconds:.2f} s wall time\n")
+        report.write(f"Traced memory: {current / 1024 / 1024:.1f} MB now, {peak / 1024 / 1024:.1f} MB process peak\n\n")
+        try:
+            stats = pstats.Stats(self.profiler, stream=report)
+            report.write(f"Top {self.top_n} functions by cumulative time\n")
+            stats.sort_stats('cumulative').print_stats(self.top_n)
+            report.write(f"Top {self.top_n} functions by own time\n")
+            stats.sort_stats('tottime').print_stats(self.top_n)
+        except TypeError:
+            # pstats refuses a profile without any calls, e.g. when the CPU profile was skipped
+            report.write("No CPU profile was collected\n\n")
+            stats = None
+        report.write(f"Top {self.top_n} allocation sites by growth\n")
+        for stat in growth[:self.top_n]:
+            report.write(f"{stat}\n")
+
+        try:
+            with _write_lock:
+                os.makedirs(profile_dir, exist_ok=True)
+                if stats is not None:
+                    stats.dump_stats(prof_path)
+                with open(report_path, 'w', encoding='utf-8') as f:
+                    f.write(report.getvalue())
+            logger.info(f"Profile of {self.name} written to {report_path}")
+            return report_path
+        except OSError as e:
+            logger.error(f"Could not write profile of {self.name} to {profile_dir}: {e}")
+            return None
+
+
+def profile_stage(name, fn):
+    """
+    Wraps a site pipeline stage so every call is profiled into the site's output directory.
+
+    Args:
+        name (str): The stage name, used for the file names.
+        fn (callable): The stage function, called with a site job dict.
+
+    Returns:
+        callable: fn itself when profiling is off, so normal runs pay nothing; otherwise the wrapper.
+    """
+    if not _enabled:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(job):
+        session = ProfileSession(name)
+        result = None
+        try:
+            result = session.run(fn, job)
+            return result
+        finally:
+            # The discover stage sets output_dir, so read it from the job after the call
+            output_dir = (result or job).get('output_dir')
+            if output_dir:
+                session.write(output_dir)
+
+    return wrapper
+
+
+def profile_callback(session, callback):
+    """
+    Wraps a Scrapy callback so its work, including every step of the generator it returns, is added to session.
+
+    Args:
+        session (ProfileSession): The session collecting the spider's profile.
+        callback (callable): The bound spider callback.
+
+    Returns:
+        callable: The wrapped callback.
+    """
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        result = session.run(callback, *args, **kwargs)
+        if inspect.isgenerator(result):
+            return _profiled_steps(session, result)
+        return result
+
+    return wrapper
+
+
+def _profiled_steps(session, generator):
+    while True:
+        try:
+            output = session.run(next, generator)
+        except StopIteration:
+            return
+        yield output
@@ -0,0 +1,140 @@
+import json
+import math
+import os
+import re
+from urllib.parse import urlparse
+from logging_config import logger
+
+# Pages scoring below this probability are skipped before the LLM stage
+RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", "0.2"))
+
+POSITIVE_URL = re.compile(r'press|news|release|announce|media-?cent|statement|newsroom|whats-?new|bulletin', re.IGNORECASE)
+NEGATIVE_URL = re.compile(
+    r'career|jobs?\b|vacanc|cookie|privacy|terms|legal|disclaimer|login|sign-?in|register|cart|checkout|'
+    r'shop|store|products?\b|pricing|contact|sitemap|search|faq|support|accessibility',
+    re.IGNORECASE
+)
+DATE_IN_URL = re.compile(r'/(19|20)\d{2}(/|-|$)|\d{4}-\d{2}-\d{2}')
+POSITIVE_WORDS = re.compile(
+    r'\b(press release|announce[sd]?|announcement|today|according to|said|ceo|quarter|results|launch(?:es|ed)?|'
+    r'partnership|acquisition|appoint(?:s|ed|ment)|media contact|for immediate release)\b',
+    re.IGNORECASE
+)
+NEGATIVE_WORDS = re.compile(
+    r'\b(add to cart|apply now|job description|we use cookies|accept cookies|cookie policy|privacy policy|'
+    r'in stock|out of stock|free shipping|sign in|create account|responsibilities|qualifications)\b',
+    re.IGNORECASE
+)
+DATE_PATTERN = re.compile(
+    r'\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.? \d{1,2},? (?:19|20)\d{2}\b|'
+    r'\b\d{1,2} (?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]* (?:19|20)\d{2}\b|'
+    r'\b(?:19|20)\d{2}-\d{2}-\d{2}\b|\b\d{1,2}/\d{1,2}/(?:19|20)\d{2}\b',
+    re.IGNORECASE
+)
+
+# Logistic regression weights; override with a JSON file of the same shape via RELEVANCE_MODEL_PATH
+DEFAULT_MODEL = {
+    'bias': -1.0,
+    'weights': {
+        'url_positive': 1.5,
+        'url_negative': -2.5,
+        'url_date': 1.0,
+        'heading_positive': 1.5,
+        'heading_links': 0.8,
+        'date_count': 2.0,
+        'keyword_density': 1.5,
+        'negative_density': -1.5,
+        'short_content': -1.5,
+    }
+}
+
+
+def load_model(path=None):
+    """
+    Loads the linear model weights from a JSON file, or returns the bundled defaults.
+
+    Args:
+        path (str): Path to a JSON file with 'bias' and 'weights' keys.
+
+    Returns:
+        dict: The model with 'bias' and 'weights'.
+    """
+    path = path or os.getenv("RELEVANCE_MODEL_PATH")
+    if not path:
+        return DEFAULT_MODEL
+    try:
+        with open(path, 'r') as f:
+            model = json.load(f)
+        logger.info(f"Loaded relevance model from {path}")
+        return model
+    except Exception as e:
+        logger.error(f"Error loading relevance model from {path}, using defaults: {e}")
+        return DEFAULT_MODEL
+
+
+def extract_features(item):
+    """
+    Computes the cheap URL, heading, date and keyword features of a scraped item.
+
+    Args:
+        item (dict): Scraped item with 'url', 'headings' and 'content'.
+
+    Returns:
+        dict: Feature name to value, each roughly between 0 and 1.
+    """
+    path = urlparse(item['url']).path
+    headings = item.get('headings') or {}
+    content = item.get('content') or ''
+    words = max(len(content.split()), 1)
+
+    positive_headings = sum(1 for heading in headings if POSITIVE_URL.search(heading) or DATE_PATTERN.search(heading))
+    linked_headings = sum(1 for link in headings.values() if link and link != "No link provided")
+
+    return {
+        'url_positive': 1.0 if POSITIVE_URL.search(path) else 0.0,
+        'url_negative': 1.0 if NEGATIVE_URL.search(path) else 0.0,
+        'url_date': 1.0 if DATE_IN_URL.search(path) else 0.0,
+        'heading_positive': min(positive_headings / 3, 1.0),
+        'heading_links': min(linked_headings / 10, 1.0),
+        'date_count': min(len(DATE_PATTERN.findall(content)) / 5, 1.0),
+        'keyword_density': min(len(POSITIVE_WORDS.findall(content)) * 1000 / words / 10, 1.0),
+        'negative_density': min(len(NEGATIVE_WORDS.findall(content)) * 1000 / words / 10, 1.0),
+        'short_content': 1.0 if words < 50 else 0.0,
+    }
+
+
+def score_item(item, model=None):
+    """
+    Scores how likely an item is to contain press release content.
+
+    Args:
+        item (dict): Scraped item with 'url', 'headings' and 'content'.
+        model (dict): Linear model weights; the bundled defaults if not given.
+
+    Returns:
+        float: Probability between 0 and 1.
+    """
+    model = model or MODEL
+    features = extract_features(item)
+    z = model['bias'] + sum(model['weights'].get(name, 0.0) * value for name, value in features.items())
+    return 1 / (1 + math.exp(-z))
+
+
+def is_relevant(item, threshold=None, model=None):
+    """
+    Decides whether a single item is worth sending to the LLM.
+
+    Args:
+        item (dict): Scraped item with 'url', 'headings' and 'content'.
+        threshold (float): Minimum score to keep the item; RELEVANCE_THRESHOLD if not given.
+        model (dict): Linear model weights; the bundled defaults if not given.
+
+    Returns:
+        tuple: (keep, score)
+    """
+    threshold = RELEVANCE_THRESHOLD if threshold is None else threshold
+    score = score_item(item, model)
+    return score >= threshold, score
+
+
+MODEL = load_model()
@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from logging_config import logger
+from excel_operations import get_excel_file_path, save_rows
+
+DEFAULT_RESULTS_PATH = os.path.join(os.path.dirname(__file__), 'outputs', 'results.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (
+    id INTEGER PRIMARY KEY,
+    parent_url TEXT NOT NULL UNIQUE,
+    output_dir TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS links (
+    id INTEGER PRIMARY KEY,
+    site_id INTEGER NOT NULL REFERENCES sites(id),
+    url TEXT NOT NULL,
+    UNIQUE (site_id, url)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    site_id INTEGER NOT NULL REFERENCES sites(id),
+    url TEXT NOT NULL,
+    UNIQUE (site_id, url)
+);
+CREATE TABLE IF NOT EXISTS llm_results (
+    page_id INTEGER PRIMARY KEY REFERENCES pages(id),
+    accepted INTEGER NOT NULL,
+    result TEXT,
+    duplicate_of TEXT,
+    created_at REAL
+);
+CREATE TABLE IF NOT EXISTS pagination (
+    id INTEGER PRIMARY KEY,
+    site_id INTEGER NOT NULL REFERENCES sites(id),
+    parent_url TEXT NOT NULL,
+    page_count INTEGER,
+    UNIQUE (site_id, parent_url)
+);
+CREATE TABLE IF NOT EXISTS pagination_links (
+    pagination_id INTEGER NOT NULL REFERENCES pagination(id),
+    url TEXT NOT NULL,
+    UNIQUE (pagination_id, url)
+);
+"""
+
+
+class ResultsStore:
+    def __init__(self, path=None):
+        """
+        Initialize the ResultsStore class.
+        Sites, their extracted links, crawled pages, LLM results and pagination are stored once each
+        in SQLite and linked by IDs; the Excel and JSON outputs are exported from here.
+        :param path: Path of the SQLite file (RESULTS_DB_PATH).
+        """
+        self.path = path or os.getenv("RESULTS_DB_PATH", DEFAULT_RESULTS_PATH)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def get_or_create_site(self, parent_url, output_dir=None):
+        """
+        :return: The ID of the site row for the parent URL.
+        """
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO sites (parent_url, output_dir, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (parent_url) DO UPDATE SET output_dir = excluded.output_dir, updated_at = excluded.updated_at",
+                (parent_url, output_dir, time.time())
+            )
+            return self.conn.execute("SELECT id FROM sites WHERE parent_url = ?", (parent_url,)).fetchone()[0]
+
+    def add_links(self, site_id, urls):
+        """
+        Store the extracted links of a site in one transaction.
+        """
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO links (site_id, url) VALUES (?, ?)",
+                ((site_id, url) for url in urls)
+            )
+
+    def add_pagination(self, site_id, pagination_info):
+        """
+        Store the pagination parents, their page counts and links in one transaction.
+        """
+        with self.lock, self.conn:
+            for parent_url, info in pagination_info.items():
+                self.conn.execute(
+                    "INSERT INTO pagination (site_id, parent_url, page_count) VALUES (?, ?, ?) "
+                    "ON CONFLICT (site_id, parent_url) DO UPDATE SET page_count = excluded.page_count",
+                    (site_id, parent_url, info.get('page_count', 0))
+                )
+                pagination_id = self.conn.execute(
+                    "SELECT id FROM pagination WHERE site_id = ? AND parent_url = ?", (site_id, parent_url)
+                ).fetchone()[0]
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO pagination_links (pagination_id, url) VALUES (?, ?)",
+                    ((pagination_id, url) for url in info.get('pagination_links', []))
+                )
+
+    def record_results(self, site_id, results, replace=False):
+        """
+        Store a batch of LLM verdicts in one transaction.
+        :param results: Iterable of dictionaries with 'url', 'accepted', 'result' and optionally 'duplicate_of'.
+        :param replace: Drop the site's earlier verdicts first, so pages no longer found or accepted leave the export.
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            if replace:
+                self.conn.execute(
+                    "DELETE FROM llm_results WHERE page_id IN (SELECT id FROM pages WHERE site_id = ?)", (site_id,)
+                )
+            for result in results:
+                self.conn.execute("INSERT OR IGNORE INTO pages (site_id, url) VALUES (?, ?)", (site_id, result['url']))
+                page_id = self.conn.execute(
+                    "SELECT id FROM pages WHERE site_id = ? AND url = ?", (site_id, result['url'])
+                ).fetchone()[0]
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO llm_results (page_id, accepted, result, duplicate_of, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (page_id, int(result['accepted']), result.get('result'), result.get('duplicate_of'), now)
+                )
+
+    def accepted_results(self, site_id):
+        """
+        :return: List of {'url', 'groq_result'} dictionaries (plus 'duplicate_of' where set) in page order.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT pages.url, llm_results.result, llm_results.duplicate_of FROM llm_results "
+                "JOIN pages ON pages.id = llm_results.page_id "
+                "WHERE pages.site_id = ? AND llm_results.accepted = 1 ORDER BY pages.id",
+                (site_id,)
+            ).fetchall()
+        results = []
+        for url, result, duplicate_of in rows:
+            entry = {'url': url, 'groq_result': result}
+            if duplicate_of:
+                entry['duplicate_of'] = duplicate_of
+            results.append(entry)
+        return results
+
+    def site_links(self, site_id):
+        with self.lock:
+            return [row[0] for row in self.conn.execute(
+                "SELECT url FROM links WHERE site_id = ? ORDER BY id", (site_id,)
+            )]
+
+    def site_pagination(self, site_id):
+        """
+        :return: The pagination info of a site in the spider's {parent_url: {'pagination_links', 'page_count'}} format.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT pagination.parent_url, pagination.page_count, pagination_links.url FROM pagination "
+                "LEFT JOIN pagination_links ON pagination_links.pagination_id = pagination.id "
+                "WHERE pagination.site_id = ? ORDER BY pagination.id",
+                (site_id,)
+            ).fetchall()
+        pagination_info = {}
+        for parent_url, page_count, url in rows:
+            info = pagination_info.setdefault(parent_url, {'pagination_links': [], 'page_count': page_count})
+            if url:
+                info['pagination_links'].append(url)
+        return pagination_info
+
+    def export_json(self, site_id, path):
+        """
+        Write the accepted results of a site to a JSON file.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.accepted_results(site_id), f, indent=2, ensure_ascii=False)
+
+    def export_excel(self, site_id, parent_url):
+        """
+        Write the accepted results of a site to its Excel file. The extracted links are written once,
+        to their own sheet, instead of being repeated in every result row.
+        """
+        links = self.site_links(site_id)
+        pagination_info = self.site_pagination(site_id)
+        rows = []
+        for index, result in enumerate(self.accepted_results(site_id), 1):
+            page_info = pagination_info.get(result['url'])
+            rows.append([
+                index,
+                parent_url,
+                f"{len(links)} links (see 'Extracted links' sheet)",
+                result['url'],
+                json.dumps(result['groq_result']),
+                result['url'] if page_info else '',
+                json.dumps(page_info['pagination_links']) if page_info else '[]',
+                page_info['page_count'] if page_info else ''
+            ])
+        save_rows(get_excel_file_path(parent_url), rows,
+                  extra_sheets={'Extracted links': (['Extracted link'], ([link] for link in links))})
+
+
+# Instantiate ResultsStore; shared by all threads and sites in the process
+
+results_store = ResultsStore()
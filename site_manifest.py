@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from logging_config import logger
+
+MANIFEST_NAME = 'manifest.json'
+ITEMS_NAME = 'manifest_items.jsonl'
+# Stages in the order they run; completing a stage drops the records of every later one
+STAGES = ['links_extracted', 'filtered', 'crawled', 'classified', 'exported']
+
+
+def file_hash(path):
+    """
+    :return: SHA-256 hex digest of a file, or None if it does not exist.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def content_hash(text):
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+class SiteManifest:
+    def __init__(self, output_dir):
+        """
+        Initialize the SiteManifest class.
+        Records in <output_dir>/manifest.json which stages of a site have completed, with the hashes of the
+        files each stage wrote, and appends the Groq result of every classified page to manifest_items.jsonl,
+        so an interrupted run resumes from the first incomplete stage or page.
+        :param output_dir: The site's output directory.
+        """
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.items_path = os.path.join(output_dir, ITEMS_NAME)
+        self.lock = threading.Lock()
+        self.data = {'stages': {}}
+        self.items = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Ignoring unreadable manifest {self.path}: {e}")
+        if os.path.exists(self.items_path):
+            with open(self.items_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by a crash; the page is classified again
+                        continue
+                    self.items[entry['url']] = entry
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def save(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with self.lock:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+
+    def is_complete(self, stage):
+        """
+        A stage is complete if it and every earlier stage were recorded and the files they wrote
+        still have the recorded hashes.
+        """
+        for name in STAGES[:STAGES.index(stage) + 1]:
+            record = self.data['stages'].get(name)
+            if record is None:
+                return False
+            for path, digest in record['outputs'].items():
+                if file_hash(os.path.join(self.output_dir, path)) != digest:
+                    logger.info(f"{path} changed since stage {name} completed; redoing it")
+                    return False
+        return True
+
+    def completed_at(self, stage):
+        """
+        :return: Time the stage was last recorded as complete, or None.
+        """
+        return self.data['stages'].get(stage, {}).get('completed_at')
+
+    def reset(self, stage):
+        """
+        Drop the records of a stage and every later one, so they run again; item results are kept.
+        """
+        with self.lock:
+            for name in STAGES[STAGES.index(stage):]:
+                self.data['stages'].pop(name, None)
+        self.save()
+
+    def stage_data(self, stage):
+        return self.data['stages'].get(stage, {}).get('data', {})
+
+    def complete(self, stage, outputs=(), **data):
+        """
+        Record a completed stage and save the manifest.
+        :param outputs: Paths of the files the stage wrote; their hashes are checked on resume.
+        :param data: JSON-serializable values the stage needs back when it is skipped.
+        """
+        with self.lock:
+            for later in STAGES[STAGES.index(stage) + 1:]:
+                self.data['stages'].pop(later, None)
+            self.data['stages'][stage] = {
+                'completed_at': time.time(),
+                'outputs': {os.path.relpath(path, self.output_dir): file_hash(path) for path in outputs},
+                'data': data,
+            }
+        self.save()
+
+    def item_result(self, url, text_hash):
+        """
+        :return: The stored Groq result of a page if it was classified with the same content, otherwise None.
+        """
+        with self.lock:
+            entry = self.items.get(url)
+        if entry and entry['content_hash'] == text_hash:
+            return entry['result']
+        return None
+
+    def record_item(self, url, text_hash, result):
+        """
+        Record the Groq result of a page by appending it to the items file.
+        """
+        entry = {'url': url, 'content_hash': text_hash, 'result': result}
+        with self.lock:
+            self.items[url] = entry
+            with open(self.items_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+from browser_pool import BrowserPool, PooledBrowser
+
+
+class DeadDriverError(Exception):
+    """Stands in for urllib3's MaxRetryError, raised once chromedriver is gone."""
+
+
+class FakeDriver:
+    def __init__(self):
+        self.dead = False
+        self.quit_called = False
+
+    def _check(self):
+        if self.dead:
+            raise DeadDriverError("Max retries exceeded: connection refused")
+
+    def execute_script(self, script):
+        self._check()
+        return 1
+
+    def delete_all_cookies(self):
+        self._check()
+
+    def get(self, url):
+        self._check()
+
+    def quit(self):
+        self.quit_called = True
+        self._check()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = BrowserPool(size=1, max_pages=10, lease_timeout=1)
+    created = []
+
+    def create_browser():
+        created.append(PooledBrowser(FakeDriver()))
+        return created[-1]
+
+    monkeypatch.setattr(pool, '_create_browser', create_browser)
+    pool.created = created
+    return pool
+
+
+def test_dead_idle_browser_is_replaced(pool):
+    with pool.lease() as browser:
+        pass
+    browser.driver.dead = True
+
+    with pool.lease() as replacement:
+        assert replacement is not browser
+    assert browser.driver.quit_called
+    assert len(pool.created) == 2
+
+
+def test_browser_dying_in_a_lease_is_quit_and_its_slot_freed(pool):
+    with pytest.raises(DeadDriverError):
+        with pool.lease() as browser:
+            browser.driver.dead = True
+            browser.driver.get('https://example.com')
+    assert browser.broken
+    assert browser.driver.quit_called
+
+    # The only slot is free again and gets a new browser
+    with pool.lease() as replacement:
+        assert replacement is not browser
+
+
+def test_browser_dying_after_a_lease_is_not_returned(pool):
+    with pool.lease() as browser:
+        browser.driver.dead = True
+    assert browser.driver.quit_called
+
+    with pool.lease() as replacement:
+        assert replacement is not browser
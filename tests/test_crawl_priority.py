@@ -0,0 +1,51 @@
+from crawl_priority import YieldTracker, link_depth, request_priority
+
+
+def test_yield_tracker_waits_for_a_full_window():
+    tracker = YieldTracker(window=4, min_yield=0.5)
+    for _ in range(3):
+        tracker.observe(False)
+
+    assert tracker.current_yield == 0.0
+    assert not tracker.exhausted()
+
+    tracker.observe(False)
+    assert tracker.exhausted()
+
+
+def test_yield_tracker_only_counts_the_window():
+    tracker = YieldTracker(window=4, min_yield=0.5)
+    for relevant in (True, True, True, True, False, False, False):
+        tracker.observe(relevant)
+
+    assert tracker.pages == 7
+    assert tracker.relevant == 4
+    # The window holds the last four pages: one relevant
+    assert tracker.current_yield == 0.25
+    assert tracker.exhausted()
+
+    tracker.observe(True)
+    tracker.observe(True)
+    assert tracker.current_yield == 0.5
+    assert not tracker.exhausted()
+
+
+def test_empty_yield_tracker():
+    tracker = YieldTracker(window=4, min_yield=0.5)
+
+    assert tracker.current_yield == 1.0
+    assert not tracker.exhausted()
+
+
+def test_link_depth():
+    assert link_depth(2, 'pagination') == 2
+    assert link_depth(0, 'seed') == 0
+    assert link_depth(2, 'card') == 3
+    assert link_depth(2, 'link') == 3
+
+
+def test_request_priority_prefers_listings_and_shallow_links():
+    assert request_priority('https://example.com/a', source='pagination') > request_priority('https://example.com/a')
+    assert request_priority('https://example.com/a', depth=1) > request_priority('https://example.com/a', depth=3)
+    assert request_priority('https://example.com/a', source='unknown') == request_priority('https://example.com/a',
+                                                                                          source='inline')
@@ -0,0 +1,74 @@
+import pytest
+
+html = pytest.importorskip("lxml.html")
+
+from dom_text import extract_page, strip_code
+
+
+def parse(markup):
+    return html.document_fromstring(markup)
+
+
+def test_skipped_subtrees_keep_their_tail_text():
+    root = parse(
+        '<html><head><title>Ignored</title></head><body>'
+        '<p>Before</p>'
+        '<script>var tracking = 1;</script>after script '
+        '<style>p { color: red; }</style>'
+        '<noscript>Enable JavaScript</noscript>'
+        '<template><p>Hidden row</p></template>'
+        '<!-- a comment -->after comment'
+        '<div>Inside <b>bold</b> tail</div>'
+        '</body></html>'
+    )
+    headings, blocks = extract_page(root)
+
+    assert headings == {}
+    assert blocks == ['Before', 'after script', 'after comment', 'Inside', 'bold', 'tail']
+    joined = ' '.join(blocks)
+    for hidden in ('tracking', 'color', 'Enable JavaScript', 'Hidden row', 'a comment', 'Ignored'):
+        assert hidden not in joined
+
+
+def test_headings_map_to_their_first_link():
+    root = parse(
+        '<html><body>'
+        '<h1>Newsroom</h1>'
+        '<h2><a href="/news/1">First   release</a> <a href="/other">second link</a></h2>'
+        '<h3>Quarterly <span><a href="/news/2">results</a></span></h3>'
+        '<h4><a>No href</a> then <a href="/news/3">linked</a></h4>'
+        '<p><a href="/not-a-heading">Paragraph link</a></p>'
+        '</body></html>'
+    )
+    headings, blocks = extract_page(root)
+
+    assert headings == {
+        'Newsroom': None,
+        'First release second link': '/news/1',
+        'Quarterly results': '/news/2',
+        'No href then linked': '/news/3',
+    }
+    assert 'Paragraph link' in blocks
+
+
+def test_tail_after_heading_is_not_part_of_it():
+    root = parse('<html><body><div><h2>Title</h2>Body text</div></body></html>')
+    headings, blocks = extract_page(root)
+
+    assert headings == {'Title': None}
+    assert blocks == ['Title', 'Body text']
+
+
+def test_fragment_without_body_is_walked_from_its_root():
+    root = html.fragment_fromstring('<div><h5><a href="/x">X</a></h5> text </div>')
+    headings, blocks = extract_page(root)
+
+    assert headings == {'X': '/x'}
+    assert blocks == ['X', 'text']
+
+
+def test_strip_code():
+    assert strip_code('  plain text  ') == 'plain text'
+    assert strip_code('Hello <b>world</b>') == 'Hello world'
+    assert strip_code('before var x = 1; after') == 'before  after'
+    assert strip_code('a <!-- note --> b') == 'a  b'
@@ -0,0 +1,101 @@
+import sys
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("lxml")
+pytest.importorskip("requests")
+
+import link_discovery
+from link_discovery import discover_links, scrape_static
+
+ARTICLE_TEXT = "Company announces quarterly results and a new partnership with a regional supplier. " * 5
+
+
+def listing(links, next_path=None, extra=''):
+    anchors = ''.join(f'<a href="{link}">Release {index}</a>' for index, link in enumerate(links))
+    next_link = f'<link rel="next" href="{next_path}">' if next_path else ''
+    return f'<html><head>{next_link}</head><body><p>{ARTICLE_TEXT}</p>{anchors}{extra}</body></html>'
+
+
+PAGES = {
+    # Server-rendered Next.js page: full anchor list and text, plus the framework's data script
+    '/ssr': listing([f'/news/{n}' for n in range(12)],
+                    extra='<script id="__NEXT_DATA__" type="application/json">{}</script>'),
+    # Two static pages chained with rel=next
+    '/paged': listing([f'/news/a{n}' for n in range(12)], next_path='/paged?page=2'),
+    '/paged?page=2': listing([f'/news/b{n}' for n in range(12)]),
+    # Client-rendered shell
+    '/spa': '<html><body><div id="root"></div><script>window.__NUXT__={}</script></body></html>',
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PAGES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fake_browser(monkeypatch):
+    calls = []
+    module = types.SimpleNamespace(scrape_pagination=lambda url: calls.append(url) or [url + '/from-browser'])
+    monkeypatch.setitem(sys.modules, 'extract_links', module)
+    return calls
+
+
+def test_server_rendered_page_with_framework_marker_stays_on_http(server, fake_browser):
+    result = discover_links(server + '/ssr')
+    assert result['method'] == 'http'
+    assert result['reason'] is None
+    assert len(result['urls']) == 12
+    assert fake_browser == []
+
+
+def test_rel_next_pages_are_followed(server):
+    urls, pages, reason = scrape_static(server + '/paged')
+    assert reason is None
+    assert pages == 2
+    assert server + '/news/a0' in urls and server + '/news/b11' in urls
+
+
+def test_js_shell_escalates_to_browser(server, fake_browser):
+    result = discover_links(server + '/spa')
+    assert result['method'] == 'browser'
+    assert result['reason'].startswith('only 0 anchors')
+    assert "framework marker" in result['reason']
+    assert fake_browser == [server + '/spa']
+
+
+def test_http_failure_escalates_to_browser(server, fake_browser):
+    result = discover_links(server + '/missing')
+    assert result['method'] == 'browser'
+    assert result['reason'].startswith('HTTP fetch failed')
+
+
+def test_few_anchors_without_marker(monkeypatch):
+    html = listing(['/a', '/b'])
+    doc, links, _ = link_discovery.parse_page(html.encode('utf-8'), 'http://example.com/')
+    assert link_discovery.looks_js_rendered(html, doc, links) == 'only 2 anchors'
@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import tempfile
+
+# Keep the module-level store out of the repository's outputs directory
+os.environ.setdefault("PAGE_STATE_PATH", os.path.join(tempfile.mkdtemp(), 'page_state.sqlite'))
+
+from page_state import PageStateStore
+
+URL = 'https://example.com/news/1'
+
+
+def test_relevance_is_kept_with_the_fetch(tmp_path):
+    store = PageStateStore(str(tmp_path / 'state.sqlite'))
+    store.record_fetch(URL, '"v1"', None, 'hash-1', [], relevant=True)
+    store.record_verdicts([{'url': URL, 'accepted': False, 'result': None}])
+
+    state = store.get(URL + '?utm_source=mail')
+    assert state['relevant'] is True
+    assert state['accepted'] is False
+
+    # A changed body drops the verdict and replaces the relevance result
+    store.record_fetch(URL, '"v2"', None, 'hash-2', [], relevant=False)
+    state = store.get(URL)
+    assert state['relevant'] is False
+    assert state['accepted'] is None
+
+
+def test_unscored_page(tmp_path):
+    store = PageStateStore(str(tmp_path / 'state.sqlite'))
+    store.record_fetch(URL, None, None, 'hash-1', [])
+
+    assert store.get(URL)['relevant'] is None
+
+
+def test_store_without_relevance_column_is_migrated(tmp_path):
+    path = str(tmp_path / 'state.sqlite')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE page_state (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT, "
+                 "links TEXT, accepted INTEGER, result TEXT, fetched_at REAL, classified_at REAL)")
+    conn.execute("INSERT INTO page_state (url, content_hash, links, accepted) VALUES (?, 'hash-1', '[]', 1)", (URL,))
+    conn.commit()
+    conn.close()
+
+    store = PageStateStore(path)
+    state = store.get(URL)
+    assert state['accepted'] is True
+    assert state['relevant'] is None
@@ -0,0 +1,69 @@
+from pagination import MAX_PAGES, infer_page_template
+
+
+def test_query_template():
+    template = infer_page_template([
+        'https://example.com/news?page=2&sort=date',
+        'https://example.com/news?sort=date&page=3',
+        'https://example.com/news?page=7&sort=date',
+    ])
+
+    assert template.kind == 'query'
+    assert template.last == 7
+    assert template.urls() == [f'https://example.com/news?sort=date&page={n}' for n in range(2, 8)]
+
+
+def test_path_template():
+    template = infer_page_template([
+        'https://example.com/press/page/2/',
+        'https://example.com/press/page/12/',
+    ])
+
+    assert template.kind == 'path'
+    assert template.last == 12
+    assert template.url(5) == 'https://example.com/press/page/5/'
+    assert template.urls(first=10) == [f'https://example.com/press/page/{n}/' for n in (10, 11, 12)]
+
+
+def test_single_numbered_link_is_no_template():
+    assert infer_page_template(['https://example.com/news?page=40']) is None
+    # The same page number linked twice (e.g. "next" and "2") is still one page
+    assert infer_page_template(['https://example.com/news?page=2', 'https://example.com/news?page=2']) is None
+
+
+def test_one_letter_keys_are_not_page_numbers():
+    # WordPress post ids
+    assert infer_page_template(['https://example.com/?p=1234', 'https://example.com/?p=1301']) is None
+
+
+def test_unrelated_links_are_ignored():
+    assert infer_page_template(['https://example.com/about', 'https://example.com/news/2024/05/']) is None
+    assert infer_page_template([]) is None
+
+
+def test_most_common_template_wins():
+    template = infer_page_template([
+        'https://example.com/news?page=2',
+        'https://example.com/news?page=3',
+        'https://example.com/news?page=4',
+        'https://example.com/events/page/2/',
+        'https://example.com/events/page/9/',
+    ])
+
+    assert template.kind == 'query'
+    assert template.last == 4
+
+
+def test_min_links():
+    urls = ['https://example.com/news?page=2', 'https://example.com/news?page=3']
+
+    assert infer_page_template(urls, min_links=3) is None
+    assert infer_page_template(urls, min_links=2).last == 3
+
+
+def test_urls_are_capped():
+    template = infer_page_template(['https://example.com/news?page=2', f'https://example.com/news?page={MAX_PAGES * 3}'])
+
+    assert len(template.urls()) == MAX_PAGES
+    assert len(template.urls(max_pages=10)) == 10
+    assert template.urls(max_pages=10)[-1] == 'https://example.com/news?page=11'
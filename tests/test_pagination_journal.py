@@ -0,0 +1,71 @@
+import json
+import os
+
+from pagination_journal import JOURNAL_NAME, SNAPSHOT_NAME, PaginationJournal, interrupted, load_pagination_info
+
+LISTING = 'https://example.com/news'
+
+
+def test_journal_is_replayed(tmp_path):
+    journal = PaginationJournal(str(tmp_path), compact_every=0)
+    journal.add_page(LISTING)
+    journal.add_link(LISTING, LISTING + '?page=2')
+    journal.add_link(LISTING, LISTING + '?page=3')
+    journal.add_link(LISTING, LISTING + '?page=2')
+    journal.add_page(LISTING)
+
+    # Nothing was closed, so the state only lives in the journal
+    assert interrupted(str(tmp_path))
+    assert not (tmp_path / SNAPSHOT_NAME).exists()
+    assert load_pagination_info(str(tmp_path)) == {
+        LISTING: {'pagination_links': [LISTING + '?page=2', LISTING + '?page=3'], 'page_count': 2}
+    }
+
+
+def test_compact_folds_the_journal_into_the_snapshot(tmp_path):
+    journal = PaginationJournal(str(tmp_path), compact_every=2)
+    journal.add_page(LISTING)
+    assert not journal.should_compact()
+    journal.add_link(LISTING, LISTING + '?page=2')
+    assert journal.should_compact()
+
+    journal.compact({LISTING: {'pagination_links': [LISTING + '?page=2'], 'page_count': 1}})
+    assert journal.events == 0
+    assert (tmp_path / JOURNAL_NAME).read_text() == ''
+
+    # Events after the compaction are added on top of the snapshot
+    journal.add_page(LISTING)
+    journal.add_link(LISTING, LISTING + '?page=3')
+    assert load_pagination_info(str(tmp_path)) == {
+        LISTING: {'pagination_links': [LISTING + '?page=2', LISTING + '?page=3'], 'page_count': 2}
+    }
+
+
+def test_close_leaves_only_the_snapshot(tmp_path):
+    journal = PaginationJournal(str(tmp_path))
+    journal.add_page(LISTING)
+    state = {LISTING: {'pagination_links': [], 'page_count': 1}}
+    journal.close(state)
+
+    assert not interrupted(str(tmp_path))
+    assert not os.path.exists(tmp_path / JOURNAL_NAME)
+    assert json.loads((tmp_path / SNAPSHOT_NAME).read_text()) == state
+    assert load_pagination_info(str(tmp_path)) == state
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    journal = PaginationJournal(str(tmp_path))
+    journal.add_link(LISTING, LISTING + '?page=2')
+    journal.file.close()
+    # A crash in the middle of a write leaves a partial line
+    with open(tmp_path / JOURNAL_NAME, 'a', encoding='utf-8') as f:
+        f.write('{"p":"https://example.com/news","l":"https://exa')
+
+    assert load_pagination_info(str(tmp_path)) == {
+        LISTING: {'pagination_links': [LISTING + '?page=2'], 'page_count': 0}
+    }
+
+
+def test_empty_directory(tmp_path):
+    assert load_pagination_info(str(tmp_path)) == {}
+    assert not interrupted(str(tmp_path))
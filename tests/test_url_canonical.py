@@ -0,0 +1,16 @@
+import pytest
+
+from url_canonical import canonicalize_url
+
+
+@pytest.mark.parametrize('url', [
+    'http://example.com:abc/x',
+    'http://example.com:99999/x',
+])
+def test_malformed_port_returns_the_url(url):
+    assert canonicalize_url(url) == url
+
+
+def test_ports():
+    assert canonicalize_url('HTTP://Example.com:80/news/') == 'http://example.com/news'
+    assert canonicalize_url('https://example.com:8443/news') == 'https://example.com:8443/news'
@@ -0,0 +1,135 @@
+import hashlib
+import math
+import os
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a visitor came from and never change the page
+TRACKING_PARAMS = {
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+    '_hsenc', '_hsmi', 'hsctatracking', 'mkt_tok', 'oly_anon_id', 'oly_enc_id', 'vero_id', 'spm', 'ref_src',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'piwik_')
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+_REPEATED_SLASHES = re.compile(r'/{2,}')
+
+# Exact fingerprints kept before the seen-set spills into a Bloom filter
+SEEN_MAX_EXACT = int(os.getenv("SEEN_MAX_EXACT", "1000000"))
+# False-positive rate of the Bloom filter, i.e. the share of new URLs wrongly treated as seen
+SEEN_BLOOM_ERROR_RATE = float(os.getenv("SEEN_BLOOM_ERROR_RATE", "0.001"))
+
+
+def _is_tracking(key):
+    key = key.lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """
+    Reduces the variants of a URL to one form: lowercase scheme and host, no default port,
+    no fragment, no tracking parameters, sorted query keys and no trailing slash. The path
+    keeps its case, since servers may treat it as case-sensitive.
+
+    Args:
+        url (str): An absolute URL.
+
+    Returns:
+        str: The canonical URL.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        # The port is parsed lazily and raises on a non-numeric or out-of-range value
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if ':' in host:
+        host = f"[{host}]"
+    if port and str(port) != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    path = _REPEATED_SLASHES.sub('/', parts.path) or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _is_tracking(key)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def url_fingerprint(url):
+    """
+    Returns a 64-bit fingerprint of the canonical form of a URL.
+    """
+    return int.from_bytes(hashlib.blake2b(canonicalize_url(url).encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=SEEN_BLOOM_ERROR_RATE):
+        """
+        Initialize the BloomFilter class.
+        :param capacity: Number of entries the filter is sized for.
+        :param error_rate: False-positive rate at that capacity.
+        """
+        self.bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, fingerprint):
+        # Double hashing on the two halves of the 64-bit fingerprint
+        low, high = fingerprint & 0xFFFFFFFF, fingerprint >> 32 | 1
+        return ((low + i * high) % self.bits for i in range(self.hashes))
+
+    def add(self, fingerprint):
+        for position in self._positions(fingerprint):
+            self.array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, fingerprint):
+        return all(self.array[position >> 3] & 1 << (position & 7) for position in self._positions(fingerprint))
+
+
+class UrlSeenSet:
+    def __init__(self, max_exact=SEEN_MAX_EXACT, error_rate=SEEN_BLOOM_ERROR_RATE):
+        """
+        Initialize the UrlSeenSet class.
+        Stores 64-bit fingerprints of canonical URLs instead of the URL strings. Past max_exact entries
+        new fingerprints go into Bloom filters instead, so memory stays flat at the cost of occasionally
+        skipping a new URL. Each full filter is followed by one twice as large with half the error rate,
+        which keeps the combined false-positive rate under twice error_rate however many URLs are added.
+        :param max_exact: Fingerprints kept exactly before spilling into the Bloom filter.
+        :param error_rate: False-positive rate of the Bloom filter.
+        """
+        self.max_exact = max_exact
+        self.error_rate = error_rate
+        self.exact = set()
+        self.blooms = []
+        self.bloom_entries = 0
+        self.bloom_capacity = 0
+
+    def _contains(self, fingerprint):
+        return fingerprint in self.exact or any(fingerprint in bloom for bloom in self.blooms)
+
+    def __contains__(self, url):
+        return self._contains(url_fingerprint(url))
+
+    def __len__(self):
+        return len(self.exact) + self.bloom_entries
+
+    def add(self, url):
+        """
+        Mark a URL as seen.
+        :return: True if the URL (in any of its variants) was not seen before.
+        """
+        fingerprint = url_fingerprint(url)
+        if self._contains(fingerprint):
+            return False
+        if len(self.exact) < self.max_exact:
+            self.exact.add(fingerprint)
+        else:
+            if self.bloom_entries >= self.bloom_capacity:
+                level = len(self.blooms)
+                capacity = max(self.max_exact, 1024) << level
+                self.blooms.append(BloomFilter(capacity, self.error_rate / 2 ** (level + 1)))
+                self.bloom_capacity += capacity
+            self.blooms[-1].add(fingerprint)
+            self.bloom_entries += 1
+        return True
@@ -0,0 +1,104 @@
+import re
+
+# Keywords the spider follows links for; matched anywhere in the URL, ignoring case
+SPIDER_KEYWORDS = [
+    'press release', 'new', 'newsroom', 'newsPage', 'press-release', 'press', 'press room',
+    'news', 'news-release', 'announcement', 'update', 'updates', 'news-research',
+    'press-room', 'results', 'media', 'releases', 'insights', 'statements', 'publications',
+    'reports', 'announcements', 'headlines', 'bulletin', 'communique', 'briefing',
+    'digest', 'gazette', 'journal', 'dispatch', 'news-feed', 'live-feed', 'breaking',
+    'newsletter'
+]
+# Keywords filter_links keeps extracted and pagination links for
+FILTER_KEYWORDS = [
+    'press', 'news', 'newsPage', 'news-releases', 'newsroom', 'press-release', 'information', 'update',
+    'updates', 'news-research', 'press-room', 'results', 'media', 'releases', 'insights', 'statements',
+    'publications', 'reports', 'announcements', 'headlines', 'bulletin', 'communique', 'briefing',
+    'digest', 'gazette', 'journal', 'dispatch', 'news-feed', 'live-feed', 'breaking', 'newsletter'
+]
+
+# Scheme and authority of an absolute URL, without the cost of a full urlparse
+_NETLOC = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*://([^/?#]*)')
+
+
+def _trie_pattern(node):
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items())]
+    if not branches:
+        return ''
+    return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+
+def compile_keywords(keywords):
+    """
+    Compiles keywords into one regex shaped like a trie of the lowercased keywords, so a URL is
+    scanned once instead of once per keyword and shared prefixes are only tried once. Keywords
+    containing a shorter keyword are dropped, since the shorter one already matches wherever they would.
+    Search it on lowercased URLs.
+    """
+    unique = sorted({keyword.lower() for keyword in keywords}, key=len)
+    needed = []
+    for keyword in unique:
+        if not any(shorter in keyword for shorter in needed):
+            needed.append(keyword)
+    trie = {}
+    for keyword in needed:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+    return re.compile(_trie_pattern(trie))
+
+
+def url_netloc(url):
+    """
+    Returns the netloc of an absolute URL, as urlparse(url).netloc does, or '' for other strings.
+    """
+    match = _NETLOC.match(url)
+    return match.group(1) if match else ''
+
+
+class UrlMatcher:
+    def __init__(self, keywords, allowed_domains=None):
+        """
+        Initialize the UrlMatcher class.
+        :param keywords: Keywords of which at least one must appear in a matching URL.
+        :param allowed_domains: Netlocs a matching URL must be on; any domain if None.
+        """
+        self.pattern = compile_keywords(keywords)
+        self.allowed_domains = None if allowed_domains is None else set(allowed_domains)
+
+    def allow_domain(self, domain):
+        if self.allowed_domains is None:
+            self.allowed_domains = set()
+        self.allowed_domains.add(domain)
+
+    def matches(self, url):
+        """
+        :return: True if the URL is on an allowed domain and contains one of the keywords.
+        """
+        if self.allowed_domains is not None and url_netloc(url) not in self.allowed_domains:
+            return False
+        return self.pattern.search(url.lower()) is not None
+
+    def filter(self, urls):
+        """
+        Batch version of matches.
+        :param urls: Iterable of URLs.
+        :return: List of the matching URLs, in input order.
+        """
+        search = self.pattern.search
+        if self.allowed_domains is None:
+            return [url for url in urls if search(url.lower())]
+        domains = self.allowed_domains
+        netloc = _NETLOC.match
+        matched = []
+        append = matched.append
+        for url in urls:
+            match = netloc(url)
+            if match and match.group(1) in domains and search(url.lower()):
+                append(url)
+        return matched
+
+
+# Shared matcher for filter_links; the spider builds its own with the domains of its input
+
+link_filter_matcher = UrlMatcher(FILTER_KEYWORDS)
@@ -1,11 +1,22 @@
 from logging_config import logger
 import time
 from tqdm import tqdm
-import json
 import os
 from api_operations import run_groq_api
-from excel_operations import update_excel, remove_row_from_excel
-from file_operations import scrape_pagination, save_to_json, filter_links, read_pagination_info, run_scrapy_command
+from llm_dispatcher import item_dispatcher
+from llm_cache import llm_cache
+from relevance_filter import is_relevant
+from near_duplicates import NearDuplicateIndex, item_fingerprint
+from boilerplate import BoilerplateStripper
+from results_store import results_store
+from page_state import page_state
+from file_operations import discover_links, save_to_json, filter_links, stream_scrapy_items
+from pipeline_scheduler import Stage, StagedPipeline
+from profiling import profile_stage
+from site_manifest import SiteManifest, content_hash
+from work_queue import RECRAWL_AFTER
+from concurrent.futures import Future
+import json
 
 updated_rows_count = 0 
 def process_url(row):
@@ -35,147 +46,326 @@ def process_url(row):
 
 
     
-def process_groq_result(item, groq_result, start_url, all_urls, results, pagination_info):
+def process_groq_result(item, groq_result, verdicts):
     """
-    Process the result from the Groq API and update the Excel file.
+    Process the result from the Groq API into a verdict for the results store.
     
     Args:
         item (dict): Dictionary containing URL and content.
         groq_result (str): Result from Groq API.
-        start_url (str): The initial URL being processed.
-        all_urls (list): List of all URLs scraped.
-        results (list): List to store the results.
-        pagination_info (dict): Pagination information dictionary.
+        verdicts (list): List to store the verdicts, written to the results store in one batch.
         
     Returns:
-        bool: True if processing was successful, False otherwise.
-    """
-
-    if groq_result and "NO PRESS RELEASE".upper() not in groq_result.upper():
-        # Append result to results list
-
-        results.append({'url': item['url'], 'groq_result': groq_result})
-        pagination_parent_url = next(iter(pagination_info.keys()), '')
-        page_info = pagination_info.get(pagination_parent_url, {})
-        # Prepare the row data for Excel
-
-        excel_row = [
-            len(results),
-            start_url,
-            json.dumps(all_urls),
-            item['url'],
-            json.dumps(groq_result),
-            pagination_parent_url,
-            json.dumps(page_info.get('pagination_links', [])),
-            page_info.get('page_count', '')
-        ]
-        
-        try:
-            update_excel(start_url, excel_row, pagination_info)
-
-        except Exception as e:
-            logger.error(f"Error updating Excel for URL {item['url']}: {e}")
+        bool: True if press release content was found, False otherwise.
+    """
 
-        return True
-    else:
-        logger.info(f"No press release content found for {item['url']}. Removing from Excel if exists.")
-        try:
-            remove_row_from_excel(start_url, item['url'])
-        except Exception as e:
-            logger.error(f"Error removing row from Excel for URL {item['url']}: {e}")
-        return False
+    accepted = bool(groq_result) and "NO PRESS RELEASE".upper() not in groq_result.upper()
+    if not accepted:
+        logger.info(f"No press release content found for {item['url']}.")
+    verdicts.append({'url': item['url'], 'accepted': accepted, 'result': groq_result if accepted else None})
+    return accepted
 
-def main(start_url):
+def discover_stage(job):
     """
-    Main function to handle the URL processing workflow.
+    Discovery stage: sets up the output directory, discovers the site's links and stores them.
     
     Args:
-        start_url (str): The initial URL to process.
+        job (dict): Site job with 'start_url'.
         
     Returns:
-        float: The total time taken for processing the URL.
+        dict: The job with 'output_dir', 'manifest', 'site_id' and 'extracted_urls_file', or None if the site was already processed.
     """
-    # Clear the cache for read_pagination_info
-    read_pagination_info.cache_clear()
-    start_time = time.time()
+    start_url = job['start_url']
     # Setup directories for output
 
     base_dir = os.getcwd()
     output_dir_name = start_url.split('/')[-1] or "default_directory"
     output_dir = os.path.join(base_dir, "outputs", output_dir_name)
-    # Skip processing if the output directory already exists
+    # Skip the site only if a previous run finished it; an interrupted run resumes from its manifest
 
-    if os.path.exists(output_dir):
-        logger.info(f"Skipping {start_url} - output directory already exists")
+    manifest = SiteManifest(output_dir)
+    if manifest.is_complete('exported'):
+        if not RECRAWL_AFTER or time.time() - manifest.completed_at('exported') < RECRAWL_AFTER:
+            logger.info(f"Skipping {start_url} - already processed")
+            return None
+        # Crawl again from the stored links; the page state turns unchanged pages into conditional requests
+        logger.info(f"Recrawling {start_url} - exported more than {RECRAWL_AFTER} seconds ago")
+        manifest.reset('crawled')
+    elif not manifest.exists and os.path.exists(os.path.join(output_dir, 'final_results.json')) and not RECRAWL_AFTER:
+        logger.info(f"Skipping {start_url} - finished before manifests were written")
         return None
     
     os.makedirs(output_dir, exist_ok=True)
-    # Scrape pagination and save extracted URLs
-
-    all_urls = scrape_pagination(start_url)
+    job['output_dir'] = output_dir
+    job['manifest'] = manifest
+    job['site_id'] = results_store.get_or_create_site(start_url, output_dir)
     extracted_urls_file = os.path.join(output_dir, 'extracted_urls.json')
+    job['extracted_urls_file'] = extracted_urls_file
+    if manifest.is_complete('links_extracted'):
+        logger.info(f"Resuming {start_url} - links already extracted")
+        return job
+    # Discover links over HTTP (or the browser as a fallback) and save extracted URLs
+
+    discovery = discover_links(start_url)
+    all_urls = discovery['urls']
     save_to_json(all_urls, extracted_urls_file)
-    # Filter links and run Scrapy command
+    # Store the site and its extracted links once in the results store
+
+    results_store.add_links(job['site_id'], all_urls)
+    # Record which discovery path was used for this site
+
+    discovery_info = {key: value for key, value in discovery.items() if key != 'urls'}
+    discovery_info_file = os.path.join(output_dir, 'discovery_info.json')
+    save_to_json(discovery_info, discovery_info_file)
+    manifest.complete('links_extracted', outputs=[extracted_urls_file, discovery_info_file])
+    return job
+
+
+def filter_stage(job):
+    """
+    Filter stage: filters the extracted links down to the ones worth crawling.
+    """
+    filtered_links_file = os.path.join(job['output_dir'], 'filtered_links.json')
+    job['filtered_links_file'] = filtered_links_file
+    if job['manifest'].is_complete('filtered'):
+        return job
+    filter_links(job['extracted_urls_file'], filtered_links_file)
+    job['manifest'].complete('filtered', outputs=[filtered_links_file])
+    return job
+
 
+def classify_item(item):
+    logger.info(f"Sending URL to Groq API: {item['url']}")
+    return run_groq_api(item['content'], item['url'], headings=item.get('headings'))
 
-    filtered_links_file = os.path.join(output_dir, 'filtered_links.json')
-    filter_links(extracted_urls_file, filtered_links_file)
 
-    scrapy_project_dir = os.path.join(base_dir, 'website_content_scraper')
-    output_json_path = os.path.join(base_dir, output_dir, 'scraped_content.json')
+def submit_classification(manifest, item):
+    """
+    Sends a page to the Groq API, or returns its result from the site manifest if the same
+    content was classified before. New results are recorded in the manifest as they arrive.
     
-    run_scrapy_command(base_dir, scrapy_project_dir, filtered_links_file, output_json_path, output_dir)
-    # Read and update pagination info
+    Returns:
+        Future: The Groq result of the page.
+    """
+    text_hash = content_hash(item['content'])
+    cached = manifest.item_result(item['url'], text_hash)
+    if cached is not None:
+        future = Future()
+        future.set_result(cached)
+        return future
 
-    pagination_info_path = os.path.join(output_dir, 'pagination_info.json')
-    pagination_info = read_pagination_info(pagination_info_path)
-    existing_pagination_info = read_pagination_info(pagination_info_path)
+    def record(done):
+        if done.exception() is None:
+            manifest.record_item(item['url'], text_hash, done.result())
 
-    if pagination_info != existing_pagination_info:
-        with open(pagination_info_path, 'w') as f:
-            json.dump(pagination_info, f)
-        logger.info(f"Updated pagination info written to {pagination_info_path}")
-    else:
-        logger.info(f"Pagination info unchanged, skipping write operation")
+    # Blocks while the LLM stage is saturated, which in turn slows the crawl down
+    future = item_dispatcher.submit(classify_item, item)
+    future.add_done_callback(record)
+    return future
 
-    filtered_pagination_links = os.path.join(output_dir, 'filtered_pagination_links.json')
-    filter_links(pagination_info_path, filtered_pagination_links)
-    # Load and process scraped data
 
+def crawl_stage(job):
+    """
+    Crawl stage: crawls the filtered links and sends each relevant, non-duplicate page to the
+    Groq API as soon as it is scraped. The stage ends when the crawl does; classification of the
+    submitted pages continues in the LLM dispatcher while the next site is crawled. When resuming
+    after a finished crawl, the saved pages are sent again and pages classified before reuse their result.
+    
+    Args:
+        job (dict): Site job from the filter stage.
+        
+    Returns:
+        dict: The job with 'classified' (list of (item, future)) and 'duplicates'.
+    """
+    output_dir = job['output_dir']
+    manifest = job['manifest']
+    output_json_path = os.path.join(output_dir, 'scraped_content.json')
+    pages_to_classify_file = os.path.join(output_dir, 'pages_to_classify.json')
+    near_duplicates_file = os.path.join(output_dir, 'near_duplicates.json')
+
+    if manifest.is_complete('crawled'):
+        logger.info(f"Resuming {job['start_url']} - crawl already finished")
+        with open(pages_to_classify_file, 'r', encoding='utf-8') as f:
+            pages = json.load(f)
+        with open(near_duplicates_file, 'r', encoding='utf-8') as f:
+            job['duplicates'] = json.load(f)
+        results_store.add_pagination(job['site_id'], manifest.stage_data('crawled').get('pagination_info', {}))
+        job['reused'] = manifest.stage_data('crawled').get('reused', [])
+        job['classified'] = [(item, submit_classification(manifest, item)) for item in pages]
+        return job
+
+    stripper = BoilerplateStripper()
+    duplicate_index = NearDuplicateIndex()
+    skipped_pages = []
+    duplicates = {}
+    classified = []
+    reused = []
+
+    def prepare_item(item):
+        # Skip obvious non-release pages and near-duplicates, and send the rest to the Groq API right away
+        keep, score = is_relevant(item)
+        if not keep:
+            skipped_pages.append({'url': item['url'], 'score': round(score, 3)})
+            return
+        representative = duplicate_index.add(item['url'], item_fingerprint(item))
+        if representative != item['url']:
+            duplicates[item['url']] = representative
+            return
+        classified.append((item, submit_classification(manifest, item)))
+
+    # Items flow from the running crawl into classification through a bounded queue
+
+    stream = stream_scrapy_items(job['filtered_links_file'], output_json_path, output_dir)
     try:
-        with open(output_json_path, 'r', encoding='utf-8') as f:
-            scraped_data = json.load(f)
-    except FileNotFoundError:
-        logger.error(f"No data file found at {output_json_path}")
-        return
+        for item in tqdm(stream, desc=f"Crawling {job['start_url']}"):
+            if item.get('unchanged'):
+                # Not modified since the last crawl; reuse the verdict stored for it
+                state = page_state.get(item['url'])
+                if state and state['accepted'] is not None:
+                    reused.append({'url': item['url'], 'accepted': state['accepted'], 'result': state['result']})
+                continue
+            for ready_item in stripper.feed(item):
+                prepare_item(ready_item)
+        for ready_item in stripper.flush():
+            prepare_item(ready_item)
+    finally:
+        stream.close()
+    results_store.add_pagination(job['site_id'], stream.pagination_info)
+    # Filter the pagination links handed back by the spider, without reading its file again
 
-    results = []
+    pagination_info_path = os.path.join(output_dir, 'pagination_info.json')
+    filtered_pagination_links = os.path.join(output_dir, 'filtered_pagination_links.json')
+    filter_links(pagination_info_path, filtered_pagination_links, data=stream.pagination_info)
+
+    save_to_json(stripper.report(), os.path.join(output_dir, 'boilerplate_report.json'))
+    save_to_json(skipped_pages, os.path.join(output_dir, 'skipped_pages.json'))
+    save_to_json(duplicates, near_duplicates_file)
+    logger.info(f"Relevance filter skipped {len(skipped_pages)} pages; "
+                f"{len(duplicates)} near-duplicate pages will reuse their representative's result; "
+                f"{len(reused)} unchanged pages reuse their last verdict")
+    # Skipped pages have their verdict already; store it so they are not parsed again while unchanged
+
+    page_state.record_verdicts({'url': page['url'], 'accepted': False, 'result': None} for page in skipped_pages)
+    # Keep the pages sent to classification so a restart does not have to crawl again
+
+    save_to_json([item for item, _ in classified], pages_to_classify_file)
+    manifest.complete('crawled', outputs=[output_json_path, pages_to_classify_file, near_duplicates_file],
+                      pagination_info=stream.pagination_info, reused=reused)
+
+    job['classified'] = classified
+    job['reused'] = reused
+    job['duplicates'] = duplicates
+    return job
+
+
+def classify_stage(job):
+    """
+    Classify stage: waits for the Groq results of the site's pages and records the verdicts.
+    """
+    if job['manifest'].is_complete('classified'):
+        job.pop('classified')
+        return job
+    verdicts = list(job.get('reused', []))
 
-    total_items = len(scraped_data)
-    for index, item in enumerate(tqdm(scraped_data, desc="Processing with Groq API"), 1):
+    classified = job.pop('classified')
+    total_items = len(classified)
+    for index, (item, future) in enumerate(classified, 1):
         try:
-            logger.info(f"Processing item {index} of {total_items}: Sending URL to Groq API: {item['url']}")
-            
-            try:
-                groq_result = run_groq_api(item['content'], item['url'])
-                process_groq_result(item, groq_result, start_url, all_urls, results, pagination_info)
-                # The retry decorator will handle retries
-            except Exception as e:
-                logger.error(f"Error processing content from {item['url']}: {e}")
-                print("Exception just after Groq API call:", e)
-                tqdm.write(f"Error processing content from {item['url']}: {e}")
+            error = future.exception()
+            if error is not None:
+                # The retry decorator has already retried the failing parts
+                logger.error(f"Error processing content from {item['url']}: {error}")
+                print("Exception just after Groq API call:", error)
+                tqdm.write(f"Error processing content from {item['url']}: {error}")
+            else:
+                process_groq_result(item, future.result(), verdicts)
             
             logger.info(f"Processed {index} out of {total_items} items")
             
         except Exception as e:
             logger.error(f"Unexpected error processing {item['url']}: {e}")
             tqdm.write(f"Unexpected error processing {item['url']}: {e}")
-    # Save final results
+    # Reuse the verdict of each representative for its near-duplicates
+
+    by_url = {verdict['url']: verdict for verdict in verdicts}
+    for url, representative in job['duplicates'].items():
+        if representative in by_url:
+            verdicts.append(dict(by_url[representative], url=url, duplicate_of=representative))
+    # Every page of the crawl has its verdict here, so it replaces the results of earlier runs
+    results_store.record_results(job['site_id'], verdicts, replace=True)
+    page_state.record_verdicts(verdicts)
+    logger.info(f"LLM cache stats after {job['start_url']}: {llm_cache.stats()}")
+    if all(future.exception() is None for _, future in classified):
+        job['manifest'].complete('classified')
+    return job
+
+
+def export_stage(job):
+    """
+    Export stage: writes the final JSON and Excel files from the results store.
+    """
+    final_results_path = os.path.join(job['output_dir'], 'final_results.json')
+    results_store.export_json(job['site_id'], final_results_path)
+    results_store.export_excel(job['site_id'], job['start_url'])
+    job['manifest'].complete('exported', outputs=[final_results_path])
+    return job
+
+
+SITE_STAGES = [
+    ('discover', discover_stage),
+    ('filter', filter_stage),
+    ('crawl', crawl_stage),
+    ('classify', classify_stage),
+    ('export', export_stage),
+]
+
+# Workers per stage: discovery may hold a browser, crawls share the Scrapy reactor,
+# classification waits on the LLM dispatcher and export writes to disk
+STAGE_WORKERS = {
+    'discover': int(os.getenv("PIPELINE_DISCOVER_WORKERS", os.getenv("BROWSER_POOL_SIZE", "2"))),
+    'filter': int(os.getenv("PIPELINE_FILTER_WORKERS", "1")),
+    'crawl': int(os.getenv("PIPELINE_CRAWL_WORKERS", "2")),
+    'classify': int(os.getenv("PIPELINE_CLASSIFY_WORKERS", "4")),
+    'export': int(os.getenv("PIPELINE_EXPORT_WORKERS", "1")),
+}
+STAGE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
 
-    final_results_path = os.path.join(output_dir, 'final_results.json')
-    with open(final_results_path, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+
+def build_site_pipeline(report_interval=None):
+    """
+    Builds the discover -> filter -> crawl -> classify -> export pipeline over site jobs.
+    With profiling enabled every stage writes its profile into the site's output directory.
+    
+    Returns:
+        StagedPipeline: The pipeline, not yet started. Jobs are created with new_site_job.
+    """
+    if report_interval is None:
+        report_interval = int(os.getenv("PIPELINE_REPORT_INTERVAL", "30"))
+    stages = [Stage(name, profile_stage(name, fn), STAGE_WORKERS[name], STAGE_QUEUE_SIZE) for name, fn in SITE_STAGES]
+    return StagedPipeline(stages, report_interval=report_interval)
+
+
+def new_site_job(start_url):
+    return {'start_url': start_url}
+
+
+def main(start_url):
+    """
+    Main function to handle the URL processing workflow, running every stage in turn.
+    
+    Args:
+        start_url (str): The initial URL to process.
+        
+    Returns:
+        float: The total time taken for processing the URL.
+    """
+    start_time = time.time()
+    job = new_site_job(start_url)
+    for name, stage in SITE_STAGES:
+        job = profile_stage(name, stage)(job)
+        if job is None:
+            return None
 
     end_time = time.time()
     total_time = end_time - start_time
-    return total_time
\ No newline at end of file
+    return total_time
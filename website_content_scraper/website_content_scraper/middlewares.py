@@ -3,9 +3,20 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import time
+import weakref
+
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import defer, error as twisted_error
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
+from metrics import metrics
+
+ADAPTIVE_CONCURRENCY = metrics.gauge('adaptive_concurrency', 'Concurrent requests allowed per domain', ['domain'])
+ADAPTIVE_DELAY = metrics.gauge('adaptive_delay_seconds', 'Download delay per domain', ['domain'])
+ADAPTIVE_LATENCY = metrics.gauge('adaptive_latency_seconds', 'Smoothed download latency per domain', ['domain'])
+ADAPTIVE_ERROR_RATE = metrics.gauge('adaptive_error_rate', 'Smoothed error rate per domain', ['domain'])
 class WebsiteContentScraperSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
     # scrapy acts as if the spider middleware does not modify the
@@ -98,3 +109,221 @@ class WebsiteContentScraperDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class ConditionalRequestMiddleware:
+    """
+    Sends If-None-Match and If-Modified-Since for pages whose last verdict is known, and flags
+    responses that did not change (304, or the same body as last time) with meta['unchanged'],
+    so the spider can skip parsing them and their stored verdict is reused.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        from page_state import page_state
+        return cls(page_state)
+
+    def process_request(self, request, spider):
+        if 'page_state' in request.meta:
+            return None
+        state = self.store.get(request.url)
+        request.meta['page_state'] = state
+        # Without a stored verdict an unchanged page would have nothing to reuse
+        if state and state['accepted'] is not None:
+            if state['etag']:
+                request.headers.setdefault('If-None-Match', state['etag'])
+            if state['last_modified']:
+                request.headers.setdefault('If-Modified-Since', state['last_modified'])
+        return None
+
+    def process_response(self, request, response, spider):
+        state = request.meta.get('page_state')
+        if response.status == 304 and state:
+            request.meta['unchanged'] = True
+        elif response.status == 200:
+            from page_state import body_hash
+            request.meta['body_hash'] = body_hash(response.body)
+            if state and state['accepted'] is not None and state['content_hash'] == request.meta['body_hash']:
+                request.meta['unchanged'] = True
+        return response
+
+
+class DomainState:
+    """
+    Observed latency and error rate of one download slot (domain), and the concurrency and delay
+    the controller currently allows it.
+    """
+
+    def __init__(self, concurrency, delay):
+        self.concurrency = concurrency
+        self.delay = delay
+        self.latency = None
+        self.error_rate = 0.0
+        self.responses = 0
+        self.errors = 0
+        self.throttled = 0
+        self.successes_since_change = 0
+        self.backoff_until = 0.0
+
+    def as_dict(self):
+        return {
+            'concurrency': self.concurrency,
+            'delay': round(self.delay, 3),
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 3),
+            'responses': self.responses,
+            'errors': self.errors,
+            'throttled': self.throttled,
+        }
+
+
+class AdaptiveConcurrencyMiddleware:
+    """
+    Adjusts the concurrency and download delay of every domain from its observed latency, error rate
+    and 429/503 answers, within ADAPTIVE_CONCURRENCY_MIN/MAX and ADAPTIVE_DELAY_MIN/MAX. Fast domains
+    gain one slot at a time while they stay under ADAPTIVE_TARGET_LATENCY; throttling answers halve
+    the concurrency and double the delay (or follow Retry-After). Runs before RetryMiddleware (550)
+    so it sees the responses that get retried.
+    """
+
+    # Live controllers, one per running crawl; read by adaptive_concurrency_state()
+    instances = weakref.WeakSet()
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.min_concurrency = settings.getint('ADAPTIVE_CONCURRENCY_MIN', 1)
+        self.max_concurrency = settings.getint('ADAPTIVE_CONCURRENCY_MAX', 32)
+        self.min_delay = settings.getfloat('ADAPTIVE_DELAY_MIN', 0.0)
+        self.max_delay = settings.getfloat('ADAPTIVE_DELAY_MAX', 30.0)
+        self.target_latency = settings.getfloat('ADAPTIVE_TARGET_LATENCY', 2.0)
+        self.max_error_rate = settings.getfloat('ADAPTIVE_MAX_ERROR_RATE', 0.1)
+        self.cooldown = settings.getfloat('ADAPTIVE_COOLDOWN', 10.0)
+        self.start_concurrency = settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN', 8)
+        self.domains = {}
+        AdaptiveConcurrencyMiddleware.instances.add(self)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('ADAPTIVE_CONCURRENCY_ENABLED', True):
+            raise NotConfigured
+        middleware = cls(crawler)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def _slot(self, request):
+        key = request.meta.get('download_slot')
+        engine = getattr(self.crawler, 'engine', None)
+        if key is None or engine is None:
+            return None, None
+        return key, engine.downloader.slots.get(key)
+
+    def _state(self, key, slot):
+        state = self.domains.get(key)
+        if state is None:
+            state = DomainState(self.start_concurrency, max(slot.delay, self.min_delay))
+            self.domains[key] = state
+        return state
+
+    def _apply(self, key, slot, state, spider):
+        state.concurrency = max(self.min_concurrency, min(self.max_concurrency, state.concurrency))
+        state.delay = max(self.min_delay, min(self.max_delay, state.delay))
+        if slot.concurrency != state.concurrency or abs(slot.delay - state.delay) > 1e-3:
+            spider.logger.debug(f'Adaptive concurrency for {key}: {state.as_dict()}')
+        slot.concurrency = state.concurrency
+        slot.delay = state.delay
+
+    def _back_off(self, state, retry_after=None):
+        state.concurrency //= 2
+        state.delay = max(state.delay * 2, retry_after or 1.0)
+        state.successes_since_change = 0
+        state.backoff_until = time.monotonic() + self.cooldown
+
+    def _observe(self, request, spider, error, throttled=False, retry_after=None):
+        key, slot = self._slot(request)
+        if slot is None:
+            return
+        state = self._state(key, slot)
+        state.responses += 1
+        state.errors += error
+        state.error_rate = 0.8 * state.error_rate + 0.2 * error
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+
+        if throttled:
+            state.throttled += 1
+            self._back_off(state, retry_after)
+        elif state.error_rate > self.max_error_rate or (state.latency or 0) > 2 * self.target_latency:
+            state.concurrency -= 1
+            state.delay = max(state.delay * 1.5, 0.25)
+            state.successes_since_change = 0
+        elif not error and (state.latency or 0) < self.target_latency and time.monotonic() >= state.backoff_until:
+            state.successes_since_change += 1
+            # Grow by one slot once a full round of requests has succeeded at the current level
+            if state.successes_since_change >= state.concurrency:
+                state.concurrency += 1
+                state.delay = state.delay * 0.75 if state.delay > 0.05 else 0.0
+                state.successes_since_change = 0
+        self._apply(key, slot, state, spider)
+
+    def process_response(self, request, response, spider):
+        throttled = response.status in (429, 503)
+        retry_after = None
+        if throttled:
+            value = response.headers.get('Retry-After')
+            if value and value.strip().isdigit():
+                retry_after = float(value.strip())
+        self._observe(request, spider, error=int(throttled or response.status >= 500),
+                      throttled=throttled, retry_after=retry_after)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        # Timeouts and refused connections are the usual sign of an overloaded site
+        self._observe(request, spider, error=1, throttled=isinstance(exception, (twisted_error.TimeoutError, twisted_error.TCPTimedOutError, defer.TimeoutError)))
+        return None
+
+    def state(self):
+        """
+        :return: Dictionary of domain to its current concurrency, delay, latency, error rate and counts.
+        """
+        # Also read from the metrics server thread while the reactor adds domains
+        return {key: state.as_dict() for key, state in list(self.domains.items())}
+
+    def spider_closed(self, spider):
+        for key, state in self.domains.items():
+            for name, value in state.as_dict().items():
+                if value is not None:
+                    self.crawler.stats.set_value(f'adaptive_concurrency/{key}/{name}', value, spider=spider)
+        spider.logger.info(f'Adaptive concurrency per domain: {self.state()}')
+        AdaptiveConcurrencyMiddleware.instances.discard(self)
+
+
+def adaptive_concurrency_state():
+    """
+    :return: Merged per-domain state of the adaptive controllers of all running crawls.
+    """
+    merged = {}
+    for middleware in list(AdaptiveConcurrencyMiddleware.instances):
+        merged.update(middleware.state())
+    return merged
+
+
+def collect_adaptive_metrics():
+    """
+    Set the per-domain gauges from the running crawls; domains of finished crawls are dropped.
+    """
+    gauges = (ADAPTIVE_CONCURRENCY, ADAPTIVE_DELAY, ADAPTIVE_LATENCY, ADAPTIVE_ERROR_RATE)
+    for gauge in gauges:
+        gauge.clear()
+    for domain, state in adaptive_concurrency_state().items():
+        for gauge, name in zip(gauges, ('concurrency', 'delay', 'latency', 'error_rate')):
+            if state[name] is not None:
+                gauge.set(state[name], domain=domain)
+
+
+# Publish the live per-domain state on every metrics export
+metrics.add_collector(collect_adaptive_metrics)
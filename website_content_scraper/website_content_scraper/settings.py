@@ -7,6 +7,14 @@
 #     https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 #     https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import os
+import sys
+
+# Make the pipeline modules in the repository root importable for standalone `scrapy crawl` runs
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
 BOT_NAME = "website_content_scraper"
 
 SPIDER_MODULES = ["website_content_scraper.spiders"]
@@ -20,7 +28,8 @@ NEWSPIDER_MODULE = "website_content_scraper.spiders"
 ROBOTSTXT_OBEY = False
 
 # Configure maximum concurrent requests performed by Scrapy (default: 16)
-#CONCURRENT_REQUESTS = 32
+# The adaptive controller below sets each domain's concurrency between its floor and ceiling
+CONCURRENT_REQUESTS = 64
 
 # Configure a delay for requests for the same website (default: 0)
 # See https://docs.scrapy.org/en/latest/topics/settings.html#download-delay
@@ -28,8 +37,20 @@ ROBOTSTXT_OBEY = False
 #DOWNLOAD_DELAY = 3
 # The download delay setting will honor only one of:
 #CONCURRENT_REQUESTS_PER_DOMAIN = 16
+# Starting concurrency of every domain before the adaptive controller adjusts it
+CONCURRENT_REQUESTS_PER_DOMAIN = 4
 #CONCURRENT_REQUESTS_PER_IP = 16
 
+# Adaptive per-domain concurrency (website_content_scraper.middlewares.AdaptiveConcurrencyMiddleware)
+ADAPTIVE_CONCURRENCY_ENABLED = True
+ADAPTIVE_CONCURRENCY_MIN = 1
+ADAPTIVE_CONCURRENCY_MAX = 32
+ADAPTIVE_DELAY_MIN = 0.0
+ADAPTIVE_DELAY_MAX = 30.0
+ADAPTIVE_TARGET_LATENCY = 2.0
+ADAPTIVE_MAX_ERROR_RATE = 0.1
+ADAPTIVE_COOLDOWN = 10.0
+
 # Disable cookies (enabled by default)
 #COOKIES_ENABLED = False
 
@@ -53,6 +74,11 @@ ROBOTSTXT_OBEY = False
 #DOWNLOADER_MIDDLEWARES = {
 #    "website_content_scraper.middlewares.WebsiteContentScraperDownloaderMiddleware": 543,
 #}
+# Runs after HttpCompressionMiddleware (590) so response bodies are hashed decompressed
+DOWNLOADER_MIDDLEWARES = {
+    "website_content_scraper.middlewares.ConditionalRequestMiddleware": 543,
+    "website_content_scraper.middlewares.AdaptiveConcurrencyMiddleware": 580,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -5,13 +5,32 @@ from urllib.parse import urlparse, urljoin
 from datetime import datetime
 import logging
 import os
+import time
+from page_state import page_state
+from url_canonical import UrlSeenSet, canonicalize_url
+from url_matcher import UrlMatcher, SPIDER_KEYWORDS
+from dom_text import extract_page, strip_code
+from pagination_journal import PaginationJournal, interrupted, load_pagination_info
+from pagination import infer_page_template
+from crawl_priority import request_priority, link_depth, YieldTracker, PAGE_BUDGET, DEPTH_BUDGET, TIME_BUDGET
+from relevance_filter import score_item, RELEVANCE_THRESHOLD
+from scrapy.exceptions import CloseSpider
+from metrics import metrics
+from profiling import profiling_enabled, ProfileSession, profile_callback
+
+PARSE_SECONDS = metrics.histogram('spider_parse_seconds', 'Time to extract the text and headings of a crawled page')
 
 class ContentSpider(scrapy.Spider):
     name = 'content_spider'
+    # Let 304 Not Modified answers to conditional requests reach parse
+    handle_httpstatus_list = [304]
     custom_settings = {
         'USER_AGENT': 'YourBot/0.1 (+http://www.yourdomain.com)',
         'LOG_LEVEL': logging.INFO,
-        'CLOSESPIDER_TIMEOUT': 3600,  # Close the spider after 1 hour
+        # Per-site budgets: close after CRAWL_TIME_BUDGET seconds (1 hour by default) or CRAWL_PAGE_BUDGET pages.
+        # CRAWL_DEPTH_BUDGET is enforced by the spider (within_depth), since DEPTH_LIMIT would also count pagination hops
+        'CLOSESPIDER_TIMEOUT': TIME_BUDGET,
+        'CLOSESPIDER_PAGECOUNT': PAGE_BUDGET,
     }
     def __init__(self, input_file=None, *args, **kwargs):
         """
@@ -21,28 +40,30 @@ class ContentSpider(scrapy.Spider):
         super(ContentSpider, self).__init__(*args, **kwargs)
         self.input_file = input_file
         self.allowed_domains = []
-        self.visited_urls = set()
-        self.keywords = [
-            'press release', 'new', 'newsroom', 'newsPage', 'press-release', 'press', 'press room', 
-            'news', 'news-release', 'announcement', 'update', 'updates', 'news-research', 
-            'press-room', 'results', 'media', 'releases', 'insights', 'statements', 'publications', 
-            'reports', 'announcements', 'headlines', 'bulletin', 'communique', 'briefing', 
-            'digest', 'gazette', 'journal', 'dispatch', 'news-feed', 'live-feed', 'breaking', 
-            'newsletter'
-        ]
-        self.url_pattern = re.compile(r'(press|news|newsPage|news-releases|newsroom|press-release|announcement|update|updates|news-research|press-room|results|media|releases|insights|statements|publications|reports|announcements|headlines|bulletin|communique|briefing|digest|gazette|journal|dispatch|news-feed|live-feed|breaking|newsletter)[a-zA-Z0-9-\/]+\/?$', re.IGNORECASE)
-
-        self.exclude_pattern = re.compile(r'contact', re.IGNORECASE)
+        # Canonical URL fingerprints, so variants of one page are fetched once
+        self.visited_urls = UrlSeenSet()
+        self.keywords = SPIDER_KEYWORDS
+        # One compiled pass over each link; domains are added as the input URLs are read
+        self.url_matcher = UrlMatcher(self.keywords, allowed_domains=[])
+
         self.pagination_handler_calls = 0
         self.parent_url = None
         self.pagination_info = {}
         self.pagination_links = set()  # Add this line
+        self._pagination_journal = None
+        self.yield_tracker = YieldTracker()
+        # In profiling mode the callbacks run under one profiler, written to the output directory on close
+        self.profile_session = None
+        if profiling_enabled():
+            self.profile_session = ProfileSession('spider_callbacks')
+            self.parse = profile_callback(self.profile_session, self.parse)
 
 
     def start_requests(self):
         """
         Read the input file containing URLs and initiate requests to those URLs.
         """
+        self.recover_pagination_info()
         # Read the filtered URLs from the input_file
         if not self.input_file:
             self.logger.error('No input file provided')
@@ -60,51 +81,59 @@ class ContentSpider(scrapy.Spider):
             domain = urlparse(url).netloc
             if domain not in self.allowed_domains:
                 self.allowed_domains.append(domain)
-            if url not in self.visited_urls:
-                self.visited_urls.add(url)
+                self.url_matcher.allow_domain(domain)
+            if self.visited_urls.add(url):
                 self.parent_url = url  # Store the parent URL
-                yield scrapy.Request(url=url, callback=self.parse, meta={'parent_url': url})
+                yield self.make_request(url, 'seed', meta={'parent_url': url})
 
     def parse(self, response):
         """
         Handle the response for each request, extract content, and handle pagination.
         :param response: The response object containing the page content.
         """
-        
+        if response.meta.get('unchanged'):
+            yield from self.parse_unchanged(response)
+            return
+        # A page that names another page as canonical is a variant of it; its content is yielded only once,
+        # but its links are still followed, e.g. ?page=N pages that all name page 1 as canonical
+        duplicate = False
+        canonical = response.xpath('//link[@rel="canonical"]/@href').get()
+        if canonical:
+            canonical = response.urljoin(canonical)
+            if canonicalize_url(canonical) != canonicalize_url(response.url) and not self.visited_urls.add(canonical):
+                self.logger.info(f'Not yielding {response.url}: canonical page {canonical} was already crawled')
+                duplicate = True
+
         content_data = {}
+        followed_links = []
+        parse_started = time.perf_counter()
 
-        for heading in response.xpath('//h1|//h2|//h3|//h4|//h5|//h6'):
-            heading_text = heading.xpath('normalize-space(.)').get()
-            link = heading.xpath('.//a/@href').extract_first()
+        # Walk the body once: script, style, noscript and template subtrees are skipped, whitespace is
+        # normalized per text node, and headings with their first link are collected on the way
+        headings, text_blocks = extract_page(response.selector.root)
+        for heading_text, link in headings.items():
             # Resolve the link to a full URL
-            if link:
-                link = response.urljoin(link) 
-            
-            # Append heading and link if exists
-            content_data[heading_text] = link if link else "No link provided"
-
-        # XPath Selection: Selects all text nodes within the body, excluding text within script and style tags.
-        # Extract Text Nodes: Extracts the text content of the selected nodes.
-        # Clean Text: Cleans the extracted text by:
-        # Stripping extra whitespace.
-        # Joining the text nodes into a single string with spaces normalized.
+            content_data[heading_text] = response.urljoin(link) if link else "No link provided"
 
-        # Extract general body content without headings
-        text_nodes = response.xpath('//body//*[not(self::script or self::style)]//text()').extract()
-        cleaned_text = ' '.join([re.sub('\s+', ' ', t.strip()) for t in text_nodes if t.strip()])
-
-        #Filter Content: Calls the filter_content method to further clean the text by removing content that looks like script or style data.
-
-        # Filter out content that looks like script/style data
-        cleaned_text = self.filter_content(cleaned_text)
+        # Filter out script/style fragments left in text nodes; keep every block as well,
+        # so repeated site-wide blocks can be stripped later
+        blocks = [block for block in (self.filter_content(t) for t in text_blocks) if block]
+        cleaned_text = ' '.join(blocks)
+        PARSE_SECONDS.observe(time.perf_counter() - parse_started)
 
         #Yield Data: Creates a dictionary containing the URL of the page, the extracted headings and their links, and the cleaned body content. This dictionary is then yielded, making it available for further processing or storage.
 
-        yield {
+        item = {
             'url': response.url,
             'headings': content_data,
-            'content': cleaned_text
+            'content': cleaned_text,
+            'blocks': blocks
         }
+        relevant = None
+        if not duplicate:
+            yield item
+            relevant = score_item(item) >= RELEVANCE_THRESHOLD
+            self.check_yield(relevant)
 
         # CSS Selection: Selects all links (href attributes) on the page.
         # Join Links: Converts relative links to absolute URLs.
@@ -115,9 +144,10 @@ class ContentSpider(scrapy.Spider):
         # Follow links that match the press release criteria and are within the allowed domains
         for href in response.css('a::attr(href)').extract():
             url = response.urljoin(href)
-            if self.should_visit_url(url) and url not in self.visited_urls:
-                self.visited_urls.add(url)
-                yield scrapy.Request(url, callback=self.parse)
+            if self.should_visit_url(url):
+                followed_links.append({'url': url, 'source': 'link'})
+                if self.within_depth(response, 'link') and self.visited_urls.add(url):
+                    yield self.make_request(url, 'link', response)
         # Regex Selection: Uses a regular expression to find all URLs in the cleaned body content.
         # Filter Links: Checks if the link matches the criteria and has not been visited.
         # Add to Visited: Adds the link to the set of visited URLs.
@@ -126,37 +156,116 @@ class ContentSpider(scrapy.Spider):
 
         # Extract and follow links from the content itself
         for link in re.findall(r'https?://\S+', cleaned_text):
-            if self.should_visit_url(link) and link not in self.visited_urls:
-                self.visited_urls.add(link)
-                yield scrapy.Request(link, callback=self.parse)
+            if self.should_visit_url(link):
+                followed_links.append({'url': link, 'source': 'inline'})
+                if self.within_depth(response, 'inline') and self.visited_urls.add(link):
+                    yield self.make_request(link, 'inline', response)
         self.logger.info("About to call handle_pagination")
 
-        pagination_request = self.handle_pagination(response)
-        if pagination_request:
+        for pagination_request in self.handle_pagination(response):
+            followed_links.append({'url': pagination_request.url, 'source': 'pagination',
+                                   'parent_url': pagination_request.meta['parent_url']})
             yield pagination_request
         self.logger.info("Finished handle_pagination")
 
-
-
         # Extract links from card elements
-        self.extract_links_from_cards(response)
+        for card_request in self.extract_links_from_cards(response):
+            followed_links.append({'url': card_request.url, 'source': 'card'})
+            yield card_request
+        # Remember the validators and links of the page for the next incremental crawl
+        self.record_page_state(response, followed_links, relevant)
         
+    def make_request(self, url, source, response=None, meta=None):
+        """
+        Build a request whose priority comes from the URL's keywords, its depth and where the link was found,
+        so the most promising pages are crawled first.
+        :param url: The URL to request.
+        :param source: 'seed', 'pagination', 'card', 'link' or 'inline'.
+        :param response: The response the link was found on, if any.
+        :param meta: Extra request meta.
+        """
+        depth = link_depth(response.meta.get('link_depth', 0), source) if response is not None else 0
+        meta = dict(meta or {}, link_depth=depth)
+        return scrapy.Request(url, callback=self.parse, priority=request_priority(url, depth, source), meta=meta)
+
+    def within_depth(self, response, source):
+        """
+        :return: True if a link of the given source found on the response stays within CRAWL_DEPTH_BUDGET.
+        Checked before a URL is marked visited, so a link cut off here can still be reached by a shorter path.
+        """
+        return link_depth(response.meta.get('link_depth', 0), source) <= DEPTH_BUDGET
+
+    def check_yield(self, relevant):
+        """
+        Record whether a parsed page looked relevant, and stop the crawl once recent pages rarely are.
+        :param relevant: Whether the page looked like release content.
+        """
+        self.yield_tracker.observe(relevant)
+        if self.yield_tracker.exhausted():
+            self.logger.info(f'Stopping crawl: only {self.yield_tracker.current_yield:.1%} of the last '
+                             f'{self.yield_tracker.window} pages looked relevant')
+            raise CloseSpider('low_yield')
+
+    def parse_unchanged(self, response):
+        """
+        Handle a page that did not change since the last crawl: its stored verdict is reused, so only
+        a marker item is yielded, and the links followed from it last time are followed again. The yield
+        tracker gets the stored relevance filter result, the same signal parse gives it.
+        :param response: A 304 response, or a 200 response with the same body as last time.
+        """
+        state = response.meta.get('page_state') or {}
+        self.logger.info(f'Unchanged since last crawl: {response.url}')
+        yield {'url': response.url, 'unchanged': True}
+        # Pages recorded before the result was stored, or as canonical duplicates, were never scored
+        if state.get('relevant') is not None:
+            self.check_yield(state['relevant'])
+        # The page still counts towards its pagination parent, as in handle_pagination
+        self.count_pagination_page(response)
+        # The stored links passed the same checks when they were first followed; pagination pages keep their parent
+        for link in state.get('links', []):
+            if isinstance(link, str):
+                # Stored before links carried their source
+                link = {'url': link, 'source': 'link'}
+            url, source = link['url'], link.get('source', 'link')
+            meta = None
+            if source == 'pagination':
+                parent_url = link.get('parent_url') or response.meta.get('parent_url', self.parent_url)
+                meta = {'parent_url': parent_url}
+                if parent_url in self.pagination_info:
+                    self.add_pagination_link(parent_url, url)
+            if self.within_depth(response, source) and self.visited_urls.add(url):
+                yield self.make_request(url, source, response, meta=meta)
+
+    def record_page_state(self, response, followed_links, relevant=None):
+        """
+        Store the ETag, Last-Modified, body hash, followed links and relevance filter result of a fetched page.
+        :param response: The response object containing the page content.
+        :param followed_links: Links followed from the page, as {'url', 'source'} dictionaries ('parent_url' for pagination).
+        :param relevant: Whether the page passed the relevance filter, or None if it was not scored.
+        """
+        if 'body_hash' not in response.meta:
+            return
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        try:
+            page_state.record_fetch(
+                response.url,
+                etag.decode('latin-1') if etag else None,
+                last_modified.decode('latin-1') if last_modified else None,
+                response.meta['body_hash'],
+                list({link['url']: link for link in followed_links}.values()),
+                relevant
+            )
+        except Exception as e:
+            self.logger.error(f'Error saving page state for {response.url}: {e}')
+
     def should_visit_url(self, url):
         """
         Determine if a URL should be visited based on allowed domains and criteria.
         :param url: The URL to check.
         :return: True if the URL should be visited, False otherwise.
         """
-        # Check if URL is in allowed domains
-        if urlparse(url).netloc not in self.allowed_domains:
-            return False
-        # Check if URL contains any of the keywords or matches the specific pattern
-        if any(keyword in url.lower() for keyword in self.keywords):
-            return True
-        if self.url_pattern.search(url) and not self.exclude_pattern.search(url):
-            return True
-        
-        return False
+        return self.url_matcher.matches(url)
 
     def filter_content(self, content):
         """
@@ -164,100 +273,132 @@ class ContentSpider(scrapy.Spider):
         :param content: The content to clean.
         :return: The cleaned content.
         """
-        # Remove common script/style content
-        patterns_to_remove = [
-            r'//<!\[CDATA\[.*?\]\]>',
-            r'var .*?;',
-            r'function .*?\}',
-            r'\(function.*?\);',
-            r'formalyze.*?;',
-            r'<!--.*?-->',
-            r'<.*?>'
-        ]
-        for pattern in patterns_to_remove:
-            content = re.sub(pattern, '', content, flags=re.DOTALL)
-        return content.strip()
+        return strip_code(content)
 
     def handle_pagination(self, response):
         """
-        Handle pagination links on the page and yield requests for next/previous pages.
+        Handle pagination links on the page and schedule every page at once. The page URL template
+        (e.g. ?page=N or /page/N/) and the last page number are inferred from the pagination links,
+        so all pages up to the last one, and all year archives, download concurrently.
         :param response: The response object containing the page content.
-        :return: A Scrapy Request for the next page if available, otherwise None.
+        :return: List of Scrapy Requests for the pages not visited yet.
         """
 
         self.pagination_handler_calls += 1
         self.logger.info(f'Handling pagination for {response.url}')
-        
+        parent_url = self.count_pagination_page(response)
+        next_page = response.css('a.next::attr(href), a[rel="next"]::attr(href), a[aria-label="Next"]::attr(href)').extract_first()
+        prev_page = response.css('a.prev::attr(href), a[rel="prev"]::attr(href), a[aria-label="Previous"]::attr(href)').extract_first()
+        last_page = response.css('a.last::attr(href), a[rel="last"]::attr(href), a[aria-label="Last"]::attr(href)').extract_first()
+        self.logger.info(f'Next page: {next_page}')
+        self.logger.info(f'Previous page: {prev_page}')
+
+        page_numbers = response.css('a.page-numbers::attr(href), a.page-link::attr(href), li.pagination a::attr(href)').extract()
+        links = [response.urljoin(link) for link in [next_page, prev_page, last_page] + page_numbers if link]
+
+        # Fill in the pages between the links shown, up to the last page number any of them reveals;
+        # generated pages still have to pass the URL filter like any other link
+        template = infer_page_template(links)
+        if template:
+            self.logger.info(f'Pagination template {template}')
+            links.extend(url for url in template.urls() if self.should_visit_url(url))
+
+        year_dropdowns = response.xpath('//select[contains(@id, "year")]/option/@value').extract()
+        links.extend(response.urljoin(year) for year in year_dropdowns if year)
+
+        requests = []
+        for page in links:
+            self.add_pagination_link(parent_url, page)
+            if self.visited_urls.add(page):
+                requests.append(self.make_request(page, 'pagination', response, meta={'parent_url': parent_url}))
+        if requests:
+            self.logger.info(f'Queueing {len(requests)} pagination pages for {parent_url}')
+        return requests
+
+    def count_pagination_page(self, response):
+        """
+        Count a crawled page towards its pagination parent and record it as one of the parent's pagination links.
+        :param response: The response of the page.
+        :return: The parent URL.
+        """
         parent_url = response.meta.get('parent_url', self.parent_url)
         if parent_url not in self.pagination_info:
             self.pagination_info[parent_url] = {
                 'pagination_links': set(),
                 'page_count': 0
             }
-        
-        self.pagination_info[parent_url]['pagination_links'].add(response.url)
+
+        self.add_pagination_link(parent_url, response.url)
         self.pagination_info[parent_url]['page_count'] += 1
-        # Write pagination info to file immediately
-        self.write_pagination_info()
-        next_page = response.css('a.next::attr(href), a[rel="next"]::attr(href), a[aria-label="Next"]::attr(href)').extract_first()
-        prev_page = response.css('a.prev::attr(href), a[rel="prev"]::attr(href), a[aria-label="Previous"]::attr(href)').extract_first()
-        self.logger.info(f'Next page: {next_page}')
-        self.logger.info(f'Previous page: {prev_page}')
+        # Journal the change instead of rewriting the whole file on every response
+        self.pagination_journal.add_page(parent_url)
+        if self.pagination_journal.should_compact():
+            self.write_pagination_info()
+        return parent_url
 
-        if next_page:
-            next_page = response.urljoin(next_page)
-            self.pagination_info[parent_url]['pagination_links'].add(next_page)
-            if next_page not in self.visited_urls:
-                self.visited_urls.add(next_page)
-                self.logger.info(f'Queueing next page: {next_page}')
-                return scrapy.Request(next_page, callback=self.parse, meta={'parent_url': parent_url})
-
-        if prev_page:
-            prev_page = response.urljoin(prev_page)
-            self.pagination_info[parent_url]['pagination_links'].add(prev_page)
-            if prev_page not in self.visited_urls:
-                self.visited_urls.add(prev_page)
-                self.logger.info(f'Queueing previous page: {prev_page}')
-                return scrapy.Request(prev_page, callback=self.parse, meta={'parent_url': parent_url})
+    def recover_pagination_info(self):
+        """
+        Rebuild the pagination links found by an interrupted crawl of this site from its snapshot and journal.
+        The pages are crawled again, so their page counts start from zero.
+        """
+        output_dir = self.settings.get('OUTPUT_DIR', '')
+        if not output_dir or not interrupted(output_dir):
+            return
+        try:
+            recovered = load_pagination_info(output_dir)
+        except Exception as e:
+            self.logger.error(f'Error recovering pagination info from {output_dir}: {e}')
+            return
+        for parent_url, info in recovered.items():
+            self.pagination_info[parent_url] = {'pagination_links': set(info['pagination_links']), 'page_count': 0}
+        self.logger.info(f'Recovered pagination links of {len(recovered)} parent URLs from an interrupted crawl')
+        # Fold the old journal into the snapshot now, so its page counts are not replayed after another crash
+        self.write_pagination_info()
 
-        page_numbers = response.css('a.page-numbers::attr(href), a.page-link::attr(href), li.pagination a::attr(href)').extract()
-        for page in page_numbers:
-            page = response.urljoin(page)
-            self.pagination_info[parent_url]['pagination_links'].add(page)
-            if page not in self.visited_urls:
-                self.visited_urls.add(page)
-                self.logger.info(f'Queueing page number: {page}')
-                return scrapy.Request(page, callback=self.parse, meta={'parent_url': parent_url})
+    @property
+    def pagination_journal(self):
+        if self._pagination_journal is None:
+            self._pagination_journal = PaginationJournal(self.settings.get('OUTPUT_DIR', ''))
+        return self._pagination_journal
 
-        year_dropdowns = response.xpath('//select[contains(@id, "year")]/option/@value').extract()
-        for year in year_dropdowns:
-            year_page = response.urljoin(year)
-            self.pagination_info[parent_url]['pagination_links'].add(year_page)
-            if year_page not in self.visited_urls:
-                self.visited_urls.add(year_page)
-                return scrapy.Request(year_page, callback=self.parse, meta={'parent_url': parent_url})
+    def add_pagination_link(self, parent_url, link):
+        """
+        Add a link to the pagination links of a parent URL, journaling it if it is new.
+        """
+        links = self.pagination_info[parent_url]['pagination_links']
+        if link not in links:
+            links.add(link)
+            self.pagination_journal.add_link(parent_url, link)
 
-    def write_pagination_info(self):
+    def get_pagination_info(self):
         """
-        Write the pagination information to a JSON file.
+        Format the pagination information with lists instead of sets so it can be serialized.
+        :return: Dictionary of parent URLs to their pagination links and page count.
         """
-        formatted_pagination_info = {
+        return {
             parent_url: {
                 'pagination_links': list(info['pagination_links']),
                 'page_count': info['page_count']
             }
             for parent_url, info in self.pagination_info.items()
         }
+
+    def write_pagination_info(self, final=False):
+        """
+        Compact the pagination journal into the pagination_info.json snapshot.
+        :param final: Remove the journal afterwards, at the end of the crawl.
+        """
+        formatted_pagination_info = self.get_pagination_info()
         # Use the output_dir passed as a parameter to the spider
-        file_path = os.path.join(self.settings.get('OUTPUT_DIR', ''), 'pagination_info.json')
-        
         try:
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, 'w') as f:
-                json.dump(formatted_pagination_info, f, indent=2)
-            self.logger.info(f'Pagination info updated in {file_path}')
+            if final:
+                self.pagination_journal.close(formatted_pagination_info)
+            else:
+                self.pagination_journal.compact(formatted_pagination_info)
+            self.logger.info(f'Pagination info updated in {self.pagination_journal.snapshot_path}')
         except Exception as e:
             self.logger.error(f'Error saving pagination info: {e}')
+        return formatted_pagination_info
 
 
     def closed(self, reason):
@@ -266,34 +407,18 @@ class ContentSpider(scrapy.Spider):
         :param reason: The reason the spider is closed.
         """
         self.logger.info(f'Spider closed with reason: {reason}. Saving pagination info.')
-        
-        formatted_pagination_info = {
-            parent_url: {
-                'pagination_links': list(info['pagination_links']),
-                'page_count': info['page_count']
-            }
-            for parent_url, info in self.pagination_info.items()
-        }
-        # Save the file in the same directory as the spider
-        file_path = os.path.join(os.path.dirname(__file__), 'pagination_info.json')
-        
-        try:
-            with open(file_path, 'w') as f:
-                json.dump(formatted_pagination_info, f, indent=2)
-            self.logger.info(f'Pagination info saved successfully to {file_path}')
-            self.logger.info(f'Pagination info: {formatted_pagination_info}')
-        except Exception as e:
-            self.logger.error(f'Error saving pagination info: {e}')
-        
-
-                
-        self.logger.info(f'Pagination info before formatting: {self.pagination_info}')
-        self.logger.info(f'Formatted pagination info: {formatted_pagination_info}')
+        # Save the file in this crawl's output directory so concurrent crawls do not overwrite each other
+        formatted_pagination_info = self.write_pagination_info(final=True)
+        self.logger.info(f'Pagination info: {formatted_pagination_info}')
         
         self.logger.info(f'Total pagination parent URLs: {len(self.pagination_info)}')
         self.logger.info(f'Total pagination links: {sum(len(info["pagination_links"]) for info in self.pagination_info.values())}')
         self.logger.info(f'Total pages crawled: {sum(info["page_count"] for info in self.pagination_info.values())}')
         self.logger.info(f'handle_pagination was called {self.pagination_handler_calls} times')
+        self.logger.info(f'Relevant pages: {self.yield_tracker.relevant}/{self.yield_tracker.pages} '
+                         f'(last {len(self.yield_tracker.recent)}: {self.yield_tracker.current_yield:.1%})')
+        if self.profile_session is not None:
+            self.profile_session.write(self.settings.get('OUTPUT_DIR', '') or '.')
 
 
 
@@ -306,6 +431,5 @@ class ContentSpider(scrapy.Spider):
         card_links = response.css('div.card a::attr(href), div.news-card a::attr(href), div.press-card a::attr(href)').extract()
         for link in card_links:
             url = response.urljoin(link)
-            if self.should_visit_url(url) and url not in self.visited_urls:
-                self.visited_urls.add(url)
-                yield scrapy.Request(url, callback=self.parse)
+            if self.should_visit_url(url) and self.within_depth(response, 'card') and self.visited_urls.add(url):
+                yield self.make_request(url, 'card', response)
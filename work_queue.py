@@ -0,0 +1,225 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+from logging_config import logger
+
+DEFAULT_QUEUE_PATH = os.path.join(os.path.dirname(__file__), 'outputs', 'work_queue.sqlite')
+# Seconds a claimed parent URL stays leased without a heartbeat before another worker may take it
+LEASE_SECONDS = int(os.getenv("WORK_LEASE_SECONDS", "900"))
+# Claims of a parent URL that ended in an error before it is marked failed
+MAX_ATTEMPTS = int(os.getenv("WORK_MAX_ATTEMPTS", "3"))
+# Set when WORK_QUEUE_PATH is on a network filesystem shared by several machines; WAL needs shared memory on one host
+SHARED_QUEUE = os.getenv("WORK_QUEUE_SHARED", "0").lower() in ('1', 'true', 'yes')
+# Seconds after which a finished parent URL is crawled again incrementally; 0 never recrawls
+RECRAWL_AFTER = int(os.getenv("RECRAWL_AFTER", "0"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    id INTEGER PRIMARY KEY,
+    parent_url TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS work_items_status ON work_items (status, lease_expires);
+"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    def __init__(self, path=None, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, shared=SHARED_QUEUE):
+        """
+        Initialize the WorkQueue class.
+        A lease-based queue of parent URLs in SQLite. Any number of processes on one host open the same file, claim
+        URLs one at a time and must heartbeat while working on them; a lease that is not renewed expires
+        and the URL is handed to the next worker that asks. Completed URLs are only handed out again
+        once requeue_done puts them back, e.g. for a recrawl.
+        The file uses WAL, which only works for processes on the same host. Workers on several machines may share
+        it over a network filesystem with working file locks if WORK_QUEUE_SHARED is set, which switches to the
+        rollback journal; SQLite on filesystems without reliable locks (many NFS setups) can corrupt the queue.
+        :param path: Path of the SQLite file (WORK_QUEUE_PATH); point every worker at the same file.
+        :param lease_seconds: Lifetime of a lease without a heartbeat.
+        :param max_attempts: Failed claims before a URL is marked failed instead of pending.
+        :param shared: Use the rollback journal instead of WAL, for a file shared across machines.
+        """
+        self.path = path or os.getenv("WORK_QUEUE_PATH", DEFAULT_QUEUE_PATH)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.lock = threading.Lock()
+        # Autocommit mode so claims can take the write lock up front with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=DELETE" if shared else "PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def _transaction(self, statements):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self.conn)
+                self.conn.execute("COMMIT")
+                return result
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, parent_urls):
+        """
+        Add parent URLs to the queue. URLs already queued, in any state, are left alone,
+        so every worker may enqueue the same input file.
+        :return: Number of URLs added.
+        """
+        now = time.time()
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO work_items (parent_url, updated_at) VALUES (?, ?)",
+                ((url, now) for url in parent_urls)
+            )
+            return conn.total_changes - before
+        added = self._transaction(insert)
+        logger.info(f"Queued {added} new parent URLs in {self.path}")
+        return added
+
+    def requeue_done(self, older_than=RECRAWL_AFTER):
+        """
+        Put parent URLs that were completed more than older_than seconds ago back to pending, so they are recrawled.
+        :param older_than: Age in seconds of the completion; 0 or less requeues nothing.
+        :return: Number of URLs requeued.
+        """
+        if older_than <= 0:
+            return 0
+        now = time.time()
+        requeued = self._transaction(lambda conn: conn.execute(
+            "UPDATE work_items SET status = 'pending', attempts = 0, error = NULL, updated_at = ? "
+            "WHERE status = 'done' AND updated_at < ?",
+            (now, now - older_than)
+        ).rowcount)
+        if requeued:
+            logger.info(f"Requeued {requeued} parent URLs finished more than {older_than} seconds ago for a recrawl")
+        return requeued
+
+    def claim(self, worker_id):
+        """
+        Lease the next pending parent URL, or one whose lease has expired.
+        :return: The parent URL, or None if there is nothing to claim.
+        """
+        now = time.time()
+        def take(conn):
+            row = conn.execute(
+                "SELECT id, parent_url, status, worker FROM work_items "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            item_id, parent_url, status, previous_worker = row
+            if status == 'leased':
+                logger.warning(f"Reclaiming expired lease on {parent_url} from {previous_worker}")
+            conn.execute(
+                "UPDATE work_items SET status = 'leased', worker = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, item_id)
+            )
+            return parent_url
+        return self._transaction(take)
+
+    def iter_claims(self, worker_id):
+        """
+        Yield parent URLs claimed one at a time until the queue has nothing left to claim.
+        """
+        while True:
+            parent_url = self.claim(worker_id)
+            if parent_url is None:
+                return
+            yield parent_url
+
+    def heartbeat(self, worker_id, parent_url=None):
+        """
+        Extend the leases held by a worker, or only the one on parent_url.
+        :return: Number of leases extended; 0 for a single URL means the lease was lost.
+        """
+        now = time.time()
+        query = "UPDATE work_items SET lease_expires = ?, updated_at = ? WHERE status = 'leased' AND worker = ?"
+        params = [now + self.lease_seconds, now, worker_id]
+        if parent_url is not None:
+            query += " AND parent_url = ?"
+            params.append(parent_url)
+        return self._transaction(lambda conn: conn.execute(query, params).rowcount)
+
+    def complete(self, worker_id, parent_url):
+        """
+        Mark a leased parent URL as done.
+        :return: False if the worker no longer held the lease.
+        """
+        now = time.time()
+        updated = self._transaction(lambda conn: conn.execute(
+            "UPDATE work_items SET status = 'done', lease_expires = NULL, error = NULL, updated_at = ? "
+            "WHERE parent_url = ? AND status = 'leased' AND worker = ?",
+            (now, parent_url, worker_id)
+        ).rowcount)
+        if not updated:
+            logger.warning(f"Completed {parent_url} after {worker_id} lost its lease")
+        return bool(updated)
+
+    def release(self, worker_id, parent_url, error=None):
+        """
+        Give a leased parent URL back. With an error the attempt is counted and the URL
+        is marked failed once it reaches max_attempts.
+        :return: False if the worker no longer held the lease.
+        """
+        now = time.time()
+        def give_back(conn):
+            return conn.execute(
+                "UPDATE work_items SET attempts = attempts + ?, error = ?, lease_expires = NULL, worker = NULL, "
+                "status = CASE WHEN attempts + ? >= ? THEN 'failed' ELSE 'pending' END, updated_at = ? "
+                "WHERE parent_url = ? AND status = 'leased' AND worker = ?",
+                (int(error is not None), error and str(error), int(error is not None), self.max_attempts,
+                 now, parent_url, worker_id)
+            ).rowcount
+        return bool(self._transaction(give_back))
+
+    def reclaim_expired(self):
+        """
+        Put every expired lease back to pending. Claims pick up expired leases anyway; this only
+        makes them visible in counts().
+        :return: Number of leases reclaimed.
+        """
+        now = time.time()
+        reclaimed = self._transaction(lambda conn: conn.execute(
+            "UPDATE work_items SET status = 'pending', worker = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now, now)
+        ).rowcount)
+        if reclaimed:
+            logger.warning(f"Reclaimed {reclaimed} expired leases")
+        return reclaimed
+
+    def counts(self):
+        """
+        :return: Dictionary of status to number of parent URLs.
+        """
+        with self.lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM work_items GROUP BY status").fetchall())
+
+    def keep_alive(self, worker_id, interval=None):
+        """
+        Heartbeat every lease of the worker from a background thread until the returned event is set.
+        """
+        interval = interval or max(self.lease_seconds / 3, 1)
+        stop = threading.Event()
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.heartbeat(worker_id)
+                except Exception as e:
+                    logger.error(f"Heartbeat failed for {worker_id}: {e}")
+        threading.Thread(target=run, name='work-queue-heartbeat', daemon=True).start()
+        return stop